@@ -1,35 +1,45 @@
 import google
 import logging
-import os
 import re
 from datetime import datetime, timedelta
 from textwrap import dedent
-from typing import Any, Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import attr
 import dask
 import mozanalysis
-from dask.distributed import Client, LocalCluster
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from dask.delayed import Delayed
 from google.cloud.exceptions import Conflict
 from google.cloud import bigquery
 from mozanalysis.experiment import TimeLimits
 from mozanalysis.utils import add_days
-from pandas import DataFrame
 
 import jetstream.errors as errors
-from jetstream.bigquery_client import BigQueryClient
-from jetstream.config import AnalysisConfiguration
+from jetstream.bigquery_client import BigQueryClient, jobs_as_completed
+from jetstream.config import AnalysisConfiguration, ExperimentConfiguration
+from jetstream.dask_cluster import current_cluster
 from jetstream.dryrun import dry_run_query
-from jetstream.statistics import Count, StatisticResult, StatisticResultCollection, Summary
+from jetstream.schedule import AnalysisSchedule, closing_window_index
+from jetstream.statistics import (
+    Binomial,
+    BootstrapMean,
+    BranchPartitionedFrame,
+    Count,
+    StatisticResult,
+    StatisticResultCollection,
+    Summary,
+    run_bootstrap_means,
+)
 
 from . import AnalysisPeriod, bq_normalize_name
 
 logger = logging.getLogger(__name__)
 
-DASK_DASHBOARD_ADDRESS = "127.0.0.1:8782"
-DASK_N_PROCESSES = int(os.getenv("JETSTREAM_PROCESSES", 0)) or None  # Defaults to number of CPUs
-
-_dask_cluster = None
+# queries of views that have been published by this process
+_published_views: Dict[str, str] = {}
 
 
 @attr.s(auto_attribs=True)
@@ -44,6 +54,11 @@ class Analysis:
     def bigquery(self):
         return BigQueryClient(project=self.project, dataset=self.dataset)
 
+    @property
+    def aggregate_pushdown(self) -> bool:
+        """Whether counts and binomial statistics are computed from aggregates in BigQuery."""
+        return self.config.experiment.aggregate_pushdown
+
     def _get_timelimits_if_ready(
         self, period: AnalysisPeriod, current_date: datetime
     ) -> Optional[TimeLimits]:
@@ -60,50 +75,24 @@ class Analysis:
         if self.config.experiment.start_date is None:
             return None
 
+        if closing_window_index(self.config.experiment, period, current_date) is None:
+            # No new analysis window closes today
+            return None
+
         time_limits_args = {
             "first_enrollment_date": self.config.experiment.start_date.strftime("%Y-%m-%d"),
             "num_dates_enrollment": dates_enrollment,
         }
 
         if period != AnalysisPeriod.OVERALL:
-            try:
-                current_time_limits = TimeLimits.for_ts(
-                    last_date_full_data=current_date_str,
-                    time_series_period=period.mozanalysis_label,
-                    **time_limits_args,
-                )
-            except ValueError:
-                # There are no analysis windows yet.
-                # TODO: Add a more specific check.
-                return None
-
-            try:
-                prior_time_limits = TimeLimits.for_ts(
-                    last_date_full_data=prior_date_str,
-                    time_series_period=period.mozanalysis_label,
-                    **time_limits_args,
-                )
-            except ValueError:
-                # We have an analysis window today, and we didn't yesterday,
-                # so we must have just closed our first window.
-                return current_time_limits
-
-            if len(current_time_limits.analysis_windows) == len(prior_time_limits.analysis_windows):
-                # No new data today
-                return None
-
-            return current_time_limits
+            return TimeLimits.for_ts(
+                last_date_full_data=current_date_str,
+                time_series_period=period.mozanalysis_label,
+                **time_limits_args,
+            )
 
         assert period == AnalysisPeriod.OVERALL
-        if (
-            self.config.experiment.end_date is None
-            or self.config.experiment.end_date.date() != current_date.date()
-            or self.config.experiment.status != "Complete"
-        ):
-            return None
-
-        if self.config.experiment.end_date is None:
-            return None
+        assert self.config.experiment.end_date is not None  # for mypy
 
         analysis_length_dates = (
             (self.config.experiment.end_date - self.config.experiment.start_date).days
@@ -137,32 +126,38 @@ class Analysis:
             view_name = "_".join([normalized_prefix, view_name])
             wildcard_expr = "_".join([normalized_prefix, wildcard_expr])
 
-        sql = dedent(
+        view_query = dedent(
             f"""
-            CREATE OR REPLACE VIEW `{self.project}.{self.dataset}.{view_name}` AS (
-                SELECT
-                    *,
-                    CAST(_TABLE_SUFFIX AS int64) AS window_index
-                FROM `{self.project}.{self.dataset}.{wildcard_expr}`
-            )
+            SELECT
+                *,
+                CAST(_TABLE_SUFFIX AS int64) AS window_index
+            FROM `{self.project}.{self.dataset}.{wildcard_expr}`
             """
         )
-        self.bigquery.execute(sql)
 
-    @dask.delayed
+        # views only depend on the wildcard expression, so they rarely need to be replaced
+        view_id = f"{self.project}.{self.dataset}.{view_name}"
+        if _published_views.get(view_id) == view_query:
+            return
+
+        existing_query = self.bigquery.view_query(view_name)
+        if existing_query is None or _normalize_sql(existing_query) != _normalize_sql(view_query):
+            self.bigquery.execute(f"CREATE OR REPLACE VIEW `{view_id}` AS ({view_query})")
+
+        _published_views[view_id] = view_query
+
     def calculate_metrics(
         self,
         exp: mozanalysis.experiment.Experiment,
         time_limits: TimeLimits,
         period: AnalysisPeriod,
         dry_run: bool,
-    ):
+    ) -> Optional[google.cloud.bigquery.job.QueryJob]:
         """
-        Calculate metrics for a specific experiment.
-        Returns the BigQuery table results are written to.
+        Submit the query calculating metrics for a specific experiment.
+        Returns the running query job; results are written to the window's metrics table.
         """
 
-        window = len(time_limits.analysis_windows)
         last_analysis_window = time_limits.analysis_windows[-1]
         # TODO: Add this functionality to TimeLimits.
         last_window_limits = attr.evolve(
@@ -173,7 +168,7 @@ class Analysis:
             ),
         )
 
-        res_table_name = self._table_name(period.value, window)
+        res_table_name = self._table_name(period.value, len(time_limits.analysis_windows))
         normalized_slug = bq_normalize_name(self.config.experiment.normandy_slug)
         enrollments_table = f"enrollments_{normalized_slug}"
 
@@ -183,77 +178,21 @@ class Analysis:
                 period.value,
                 self.config.experiment.normandy_slug,
             )
-        else:
-            logger.info(
-                "Executing query for %s (%s)",
-                self.config.experiment.normandy_slug,
-                period.value,
-            )
-
-            metrics_sql = exp.build_metrics_query(
-                {m.metric for m in self.config.metrics[period]},
-                last_window_limits,
-                enrollments_table,
-            )
-
-            self.bigquery.execute(metrics_sql, res_table_name)
-            self._publish_view(period)
-
-        return res_table_name
-
-    @dask.delayed
-    def calculate_statistics(
-        self,
-        metric: Summary,
-        segment_data: DataFrame,
-        segment: str,
-    ) -> StatisticResultCollection:
-        """
-        Run statistics on metric.
-        """
-        return metric.run(segment_data, self.config.experiment).set_segment(segment)
+            return None
 
-    @dask.delayed
-    def counts(self, segment_data: DataFrame, segment: str) -> StatisticResultCollection:
-        """Count and missing count statistics."""
-        counts = (
-            Count()
-            .transform(segment_data, "*", "*", self.config.experiment.normandy_slug)
-            .set_segment(segment)
-        ).to_dict()["data"]
-
-        return StatisticResultCollection(
-            counts
-            + [
-                StatisticResult(
-                    metric="identity",
-                    statistic="count",
-                    parameter=None,
-                    branch=b.slug,
-                    comparison=None,
-                    comparison_to_branch=None,
-                    ci_width=None,
-                    point=0,
-                    lower=None,
-                    upper=None,
-                    segment=segment,
-                )
-                for b in self.config.experiment.branches
-                if b.slug not in {c["branch"] for c in counts}
-            ]
+        logger.info(
+            "Submitting query for %s (%s)",
+            self.config.experiment.normandy_slug,
+            period.value,
         )
 
-    @dask.delayed
-    def subset_to_segment(self, segment: str, metrics_data: DataFrame) -> DataFrame:
-        """Return metrics data for segment"""
-        if segment != "all":
-            if segment not in metrics_data.columns:
-                raise ValueError(f"Segment {segment} not in metrics table")
-            segment_data = metrics_data[metrics_data[segment]]
-        else:
-            segment_data = metrics_data
+        metrics_sql = exp.build_metrics_query(
+            {m.metric for m in self.config.metrics[period]},
+            last_window_limits,
+            enrollments_table,
+        )
 
-        return segment_data
+        return self.bigquery.submit(metrics_sql, res_table_name)
 
     def check_runnable(self, current_date: Optional[datetime] = None) -> bool:
         if self.config.experiment.normandy_slug is None:
@@ -364,7 +303,7 @@ class Analysis:
     def save_statistics(
         self,
         period: AnalysisPeriod,
-        segment_results: List[Dict[str, Any]],
+        segment_results: List[StatisticResultCollection],
         metrics_table: str,
     ):
         """Write statistics to BigQuery."""
@@ -373,8 +312,10 @@ class Analysis:
         job_config.write_disposition = bigquery.job.WriteDisposition.WRITE_TRUNCATE
 
         # wait for the job to complete
-        self.bigquery.load_table_from_json(
-            segment_results, f"statistics_{metrics_table}", job_config=job_config
+        self.bigquery.load_table_from_arrow(
+            StatisticResultCollection.concat(segment_results).to_arrow(),
+            f"statistics_{metrics_table}",
+            job_config=job_config,
         )
 
         self._publish_view(period, table_prefix="statistics")
@@ -383,7 +324,6 @@ class Analysis:
         """
         Run analysis using mozanalysis for a specific experiment.
         """
-        global _dask_cluster
         logger.info("Analysis.run invoked for experiment %s", self.config.experiment.normandy_slug)
 
         self.check_runnable(current_date)
@@ -391,19 +331,7 @@ class Analysis:
 
         self.ensure_enrollments(current_date)
 
-        # set up dask
-        _dask_cluster = _dask_cluster or LocalCluster(
-            dashboard_address=DASK_DASHBOARD_ADDRESS,
-            processes=True,
-            threads_per_worker=1,
-            n_workers=DASK_N_PROCESSES,
-        )
-        client = Client(_dask_cluster)
-
-        # prepare dask tasks
-        results = []
-        table_to_dataframe = dask.delayed(self.bigquery.table_to_dataframe)
-
+        windows = []
         for period in self.config.metrics:
             time_limits = self._get_timelimits_if_ready(period, current_date)
 
@@ -415,43 +343,268 @@ class Analysis:
                 )
                 continue
 
-            exp = mozanalysis.experiment.Experiment(
-                experiment_slug=self.config.experiment.normandy_slug,
-                start_date=self.config.experiment.start_date.strftime("%Y-%m-%d"),
-                app_id=self._app_id_to_bigquery_dataset(self.config.experiment.app_id),
+            windows.append((period, time_limits))
+
+        self._run_windows(windows, dry_run)
+
+    def _plan_windows(
+        self, start_date: datetime, end_date: datetime
+    ) -> List[Tuple[AnalysisPeriod, TimeLimits]]:
+        """
+        Returns the analysis windows that close between start_date and end_date (inclusive).
+
+        Every analysis window closes on exactly one date, so each window is only returned once.
+        """
+        if self.config.experiment.end_date:
+            # the experiment has ended; Analysis.run would refuse to analyse later dates
+            end_date = min(end_date, self.config.experiment.end_date)
+
+        schedule = AnalysisSchedule.for_config(self.config, start_date, end_date)
+        windows = []
+        for task in schedule.tasks:
+            time_limits = self._get_timelimits_if_ready(task.period, task.date)
+            assert time_limits is not None
+            windows.append((task.period, time_limits))
+        return windows
+
+    def run_range(self, start_date: datetime, end_date: datetime, dry_run: bool = False) -> None:
+        """
+        Run analysis for all analysis windows that close between start_date and end_date.
+
+        In contrast to calling `run` once per date, enrollments are only ensured once
+        and all windows are computed in a single dask task graph.
+        """
+        logger.info(
+            "Analysis.run_range invoked for experiment %s (%s to %s)",
+            self.config.experiment.normandy_slug,
+            start_date.strftime("%Y-%m-%d"),
+            end_date.strftime("%Y-%m-%d"),
+        )
+
+        self.check_runnable()
+        assert self.config.experiment.start_date is not None  # for mypy
+
+        windows = self._plan_windows(start_date, end_date)
+
+        if not windows:
+            logger.info(
+                "Skipping %s; no analysis windows close between %s and %s",
+                self.config.experiment.normandy_slug,
+                start_date.strftime("%Y-%m-%d"),
+                end_date.strftime("%Y-%m-%d"),
             )
+            return
+
+        last_date = min(end_date, self.config.experiment.end_date or end_date)
+        self.ensure_enrollments(last_date)
+
+        self._run_windows(windows, dry_run)
 
-            metrics_table = self.calculate_metrics(exp, time_limits, period, dry_run)
+    def _run_windows(
+        self, windows: Iterable[Tuple[AnalysisPeriod, TimeLimits]], dry_run: bool
+    ) -> None:
+        """Calculate metrics and statistics for the provided analysis windows."""
+        assert self.config.experiment.start_date is not None  # for mypy
+
+        client = current_cluster().client
+
+        exp = mozanalysis.experiment.Experiment(
+            experiment_slug=self.config.experiment.normandy_slug,
+            start_date=self.config.experiment.start_date.strftime("%Y-%m-%d"),
+            app_id=self._app_id_to_bigquery_dataset(self.config.experiment.app_id),
+        )
+
+        # a window that fails doesn't stop the other windows; the failures are logged
+        # per window and the first one is raised once all windows have finished
+        failures: List[Exception] = []
+
+        def window_failed(metrics_table: str, e: Exception) -> None:
+            failures.append(e)
+            logger.exception(
+                f"Analysis window {metrics_table} failed: {e}",
+                exc_info=e,
+                extra={"experiment": self.config.experiment.normandy_slug},
+            )
+
+        # submit the metrics queries of all windows at once; waiting for BigQuery
+        # doesn't occupy any dask workers
+        jobs: Dict[google.cloud.bigquery.job.QueryJob, Tuple[AnalysisPeriod, str, str]] = {}
+        for period, time_limits in windows:
+            metrics_table = self._table_name(period.value, len(time_limits.analysis_windows))
+            try:
+                job = self.calculate_metrics(exp, time_limits, period, dry_run)
+            except Exception as e:
+                window_failed(metrics_table, e)
+                continue
 
-            if dry_run:
+            if job is None:
                 logger.info(
                     "Not calculating statistics %s (%s); dry run",
                     self.config.experiment.normandy_slug,
                     period.value,
                 )
-                results.append(metrics_table)
                 continue
 
-            metrics_data = table_to_dataframe(metrics_table)
+            jobs[job] = (period, metrics_table, metrics_table)
+
+        # once the metrics table of a window is ready, the tables summarizing it in BigQuery
+        # are submitted and waited for like the metrics tables; statistics are computed as
+        # soon as all tables of a window are ready
+        summary_jobs: Dict[str, Set[google.cloud.bigquery.job.QueryJob]] = {}
+        result_futures = {}
+        failed_tables: Set[str] = set()
+        for job in jobs_as_completed(jobs):
+            period, metrics_table, destination = jobs[job]
+            if metrics_table in failed_tables:
+                continue
 
-            segment_results = []
+            try:
+                self.bigquery.wait(job, destination)
+
+                if destination == metrics_table:
+                    self._publish_view(period)
+                    summary_jobs[metrics_table] = set()
+                    queries = self._summary_queries(period, metrics_table)
+                    for summary_table, query in queries.items():
+                        summary_job = self.bigquery.submit(query, summary_table)
+                        jobs[summary_job] = (period, metrics_table, summary_table)
+                        summary_jobs[metrics_table].add(summary_job)
+                else:
+                    summary_jobs[metrics_table].remove(job)
+
+                if not summary_jobs[metrics_table]:
+                    result_futures[metrics_table] = client.compute(
+                        self._statistics(period, metrics_table)
+                    )
+            except Exception as e:
+                failed_tables.add(metrics_table)
+                window_failed(metrics_table, e)
+
+        for metrics_table, future in result_futures.items():
+            try:
+                client.gather(future)  # block until the future has finished
+            except Exception as e:
+                window_failed(metrics_table, e)
+
+        if failures:
+            raise failures[0]
+
+    def _histogram_summaries(self, period: AnalysisPeriod) -> List[Summary]:
+        """
+        Returns the summaries of discrete metrics, which are summarized as histograms, so
+        their download size depends on the number of distinct values rather than clients.
+        """
+        return [m for m in self.config.metrics[period] if _uses_histograms(m)]
 
-            segment_labels = ["all"] + [s.name for s in self.config.experiment.segments]
-            for segment in segment_labels:
-                segment_data = self.subset_to_segment(segment, metrics_data)
-                for m in self.config.metrics[period]:
-                    segment_results += self.calculate_statistics(
-                        m,
-                        segment_data,
-                        segment,
-                    ).to_dict()["data"]
+    def _aggregate_summaries(self, period: AnalysisPeriod) -> List[Summary]:
+        """
+        Returns the summaries that only need per-branch counts, which are computed from
+        a table of aggregates, so their client-level data is never downloaded.
+        """
+        if not self.aggregate_pushdown:
+            return []
+        return [
+            m
+            for m in self.config.metrics[period]
+            if _uses_aggregates(m) and not _uses_histograms(m)
+        ]
+
+    def _summary_queries(self, period: AnalysisPeriod, metrics_table: str) -> Dict[str, str]:
+        """Returns the queries summarizing a metrics table in BigQuery, by destination table."""
+        histogram_summaries = self._histogram_summaries(period)
+        if not self.aggregate_pushdown and not histogram_summaries:
+            return {}
+
+        table = f"{self.bigquery.project}.{self.bigquery.dataset}.{metrics_table}"
+        schema = self.bigquery.table_schema(metrics_table)
+        segments = [s.name for s in self.config.experiment.segments]
+        queries = {}
+        if self.aggregate_pushdown:
+            # counts are aggregated even if no other summaries are
+            metrics = sorted({m.metric.name for m in self._aggregate_summaries(period)})
+            queries[f"aggregates_{metrics_table}"] = aggregates_query(
+                table, schema, metrics, segments
+            )
+        if histogram_summaries:
+            metrics = sorted({m.metric.name for m in histogram_summaries})
+            queries[f"histograms_{metrics_table}"] = histograms_query(
+                table, schema, metrics, segments
+            )
+        return queries
+
+    def _statistics(self, period: AnalysisPeriod, metrics_table: str) -> Delayed:
+        """Returns the dask task computing and saving statistics on a metrics table."""
+        table_to_arrow = dask.delayed(self.bigquery.table_to_arrow)
+
+        # client-level data is read once, restricted to the metrics it's needed for, and
+        # partitioned by branch once, with segments as masks over its rows; statistics tasks
+        # refer to the partitioned frame by key, so it is transferred once per worker rather
+        # than pickled into every task
+        experiment = dask.delayed(self.config.experiment, pure=True)
+        segment_labels = ["all"] + [s.name for s in self.config.experiment.segments]
+        segment_columns = [s.name for s in self.config.experiment.segments]
+
+        histogram_summaries = self._histogram_summaries(period)
+
+        # bootstrapped means of all metrics are computed jointly on a single read
+        bootstrap_summaries = [
+            m
+            for m in self.config.metrics[period]
+            if isinstance(m.statistic, BootstrapMean) and not _uses_histograms(m)
+        ]
+        bootstrap_metrics = sorted({m.metric.name for m in bootstrap_summaries})
+
+        aggregate_summaries = self._aggregate_summaries(period)
+        summaries_by_metric: Dict[str, List[Summary]] = {}
+        for m in self.config.metrics[period]:
+            if isinstance(m.statistic, BootstrapMean) or _uses_histograms(m):
+                continue
+            if not (self.aggregate_pushdown and _uses_aggregates(m)):
+                summaries_by_metric.setdefault(m.metric.name, []).append(m)
 
-                segment_results += self.counts(segment_data, segment).to_dict()["data"]
+        client_metrics = sorted(set(summaries_by_metric) | set(bootstrap_metrics))
+        if client_metrics or not self.aggregate_pushdown:
+            client_data = table_to_arrow(
+                metrics_table, ["branch"] + client_metrics + segment_columns
+            )
+        if self.aggregate_pushdown:
+            aggregates = table_to_arrow(f"aggregates_{metrics_table}")
+        if histogram_summaries:
+            histograms = table_to_arrow(f"histograms_{metrics_table}")
 
-            results.append(self.save_statistics(period, segment_results, metrics_table))
+        segment_results = []
 
-        result_futures = client.compute(results)
-        client.gather(result_futures)  # block until futures have finished
+        if client_metrics or not self.aggregate_pushdown:
+            frame = partition_table(client_data, client_metrics, segment_columns)
+
+        # each summary is run on all segments in one task, so the segments share the
+        # counts and compressed columns the frame computes for all of them at once
+        for summaries in summaries_by_metric.values():
+            for m in summaries:
+                segment_results.append(calculate_statistics(frame, segment_labels, m, experiment))
+
+        if not self.aggregate_pushdown:
+            segment_results.append(counts(frame, segment_labels, experiment))
+
+        for segment in segment_labels:
+            for m in histogram_summaries:
+                segment_results.append(
+                    calculate_histogram_statistics(histograms, segment, m, experiment)
+                )
+
+            if bootstrap_summaries:
+                segment_results.append(
+                    calculate_bootstrap_means(frame, segment, bootstrap_summaries, experiment)
+                )
+
+            if self.aggregate_pushdown:
+                for m in aggregate_summaries:
+                    segment_results.append(
+                        calculate_aggregate_statistics(aggregates, segment, m, experiment)
+                    )
+                segment_results.append(aggregate_counts(aggregates, segment, experiment))
+
+        return self.save_statistics(period, segment_results, metrics_table)
 
     def ensure_enrollments(self, current_date: datetime) -> None:
         """Ensure that enrollment tables for experiment are up-to-date or re-create."""
@@ -488,3 +641,269 @@ class Analysis:
             )
         except Conflict:
             pass
+
+
+def _normalize_sql(sql: str) -> str:
+    """Normalizes whitespace and enclosing parentheses, for comparing queries."""
+    sql = " ".join(sql.split())
+    while sql.startswith("(") and sql.endswith(")"):
+        sql = sql[1:-1].strip()
+    return sql
+
+
+@dask.delayed
+def partition_table(
+    metrics_data: pa.Table, metrics: List[str], segments: List[str]
+) -> BranchPartitionedFrame:
+    """
+    Partitions the metric columns by branch, with the segment columns as masks over the
+    rows, so segments are evaluated without copying the metrics data.
+    """
+    return BranchPartitionedFrame.from_arrow(metrics_data, metrics, segments)
+
+
+@dask.delayed
+def calculate_statistics(
+    frame: BranchPartitionedFrame,
+    segments: List[str],
+    metric: Summary,
+    experiment: ExperimentConfiguration,
+) -> StatisticResultCollection:
+    """
+    Run statistics on metric for the partitioned rows of each segment.
+    """
+    return StatisticResultCollection.concat(
+        [
+            metric.run(frame.segment(segment), experiment).set_segment(segment)
+            for segment in segments
+        ]
+    )
+
+
+@dask.delayed
+def calculate_bootstrap_means(
+    frame: BranchPartitionedFrame,
+    segment: str,
+    summaries: List[Summary],
+    experiment: ExperimentConfiguration,
+) -> StatisticResultCollection:
+    """
+    Run the BootstrapMean summaries of all metrics jointly for the partitioned rows of
+    a segment.
+    """
+    return run_bootstrap_means(summaries, frame.segment(segment), experiment).set_segment(segment)
+
+
+@dask.delayed
+def counts(
+    frame: BranchPartitionedFrame, segments: List[str], experiment: ExperimentConfiguration
+) -> StatisticResultCollection:
+    """Count and missing count statistics of each segment."""
+    return StatisticResultCollection.concat(
+        [
+            _with_missing_branches(
+                Count().transform_partitioned(frame.segment(segment), "*", "*", experiment),
+                experiment,
+            ).set_segment(segment)
+            for segment in segments
+        ]
+    )
+
+
+def _with_missing_branches(
+    counts: StatisticResultCollection, experiment: ExperimentConfiguration
+) -> StatisticResultCollection:
+    """Adds zero counts for branches without any clients."""
+    counted = set(counts.columns["branch"])
+    counts.extend(
+        StatisticResultCollection.from_columns(
+            metric="identity",
+            statistic="count",
+            branch=[b.slug for b in experiment.branches if b.slug not in counted],
+            point=0,
+        )
+    )
+    return counts
+
+
+def _uses_aggregates(summary: Summary) -> bool:
+    """Returns whether the summary can be computed from aggregates computed in BigQuery."""
+    return isinstance(summary.statistic, Binomial) and not summary.pre_treatments
+
+
+def _uses_compressed(summary: Summary) -> bool:
+    """Returns whether the summary can be computed from a compressed metric column."""
+    return not summary.pre_treatments and summary.statistic.supports_compressed()
+
+
+def _uses_histograms(summary: Summary) -> bool:
+    """Returns whether the summary is computed from histograms computed in BigQuery."""
+    return summary.discrete and _uses_compressed(summary)
+
+
+def _aggregate_value(column: str, field_type: str) -> str:
+    """Returns the SQL expression of a metric's value for aggregating it."""
+    if field_type in ("BOOL", "BOOLEAN"):
+        return f"CAST(CAST(metrics_data.`{column}` AS INT64) AS FLOAT64)"
+    if field_type in ("INTEGER", "INT64", "FLOAT", "FLOAT64", "NUMERIC", "BIGNUMERIC"):
+        return f"CAST(metrics_data.`{column}` AS FLOAT64)"
+    # values of other types are never 0 or 1
+    return "CAST(NULL AS FLOAT64)"
+
+
+def _segment_structs(segments: Iterable[str]) -> str:
+    """Returns an array of the segment labels and whether a client is in each segment."""
+    structs = ["STRUCT('all' AS segment, TRUE AS in_segment)"] + [
+        f"STRUCT('{segment}' AS segment, metrics_data.`{segment}` AS in_segment)"
+        for segment in segments
+    ]
+    return f"ARRAY<STRUCT<segment STRING, in_segment BOOL>>[{', '.join(structs)}]"
+
+
+def _metric_structs(
+    schema: List[bigquery.SchemaField], metrics: Iterable[str], identity: bool = False
+) -> str:
+    """
+    Returns an array of the metric names and a client's values.
+
+    Metrics that aren't in the metrics table are skipped. If `identity` is set, the array
+    also contains the metric `identity` without values, for counting clients.
+    """
+    field_types = {field.name: field.field_type for field in schema}
+    structs = ["STRUCT('identity' AS metric, CAST(NULL AS FLOAT64) AS value)"] if identity else []
+    structs += [
+        f"STRUCT('{metric}' AS metric, {_aggregate_value(metric, field_types[metric])} AS value)"
+        for metric in metrics
+        if metric in field_types
+    ]
+    return f"ARRAY<STRUCT<metric STRING, value FLOAT64>>[{', '.join(structs)}]"
+
+
+def aggregates_query(
+    table: str,
+    schema: List[bigquery.SchemaField],
+    metrics: Iterable[str],
+    segments: Iterable[str],
+) -> str:
+    """
+    Returns the query aggregating the metrics of a metrics table per segment and branch.
+
+    For every segment, branch and metric, the result contains the number of clients `n`,
+    the number of clients with value 1 `successes` and the number of clients with
+    `invalid` values that are null or neither 0 nor 1. Client counts are returned
+    as the metric `identity`.
+    """
+    return dedent(
+        f"""
+        SELECT
+            segments.segment,
+            metrics_data.branch,
+            metrics.metric,
+            COUNT(*) AS n,
+            COUNTIF(metrics.value = 1) AS successes,
+            COUNTIF(metrics.value IS NULL OR metrics.value NOT IN (0, 1)) AS invalid
+        FROM `{table}` AS metrics_data
+        CROSS JOIN UNNEST({_segment_structs(segments)}) AS segments
+        CROSS JOIN UNNEST({_metric_structs(schema, metrics, identity=True)}) AS metrics
+        WHERE segments.in_segment AND metrics_data.branch IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def histograms_query(
+    table: str,
+    schema: List[bigquery.SchemaField],
+    metrics: Iterable[str],
+    segments: Iterable[str],
+) -> str:
+    """
+    Returns the query computing histograms of the metrics of a metrics table.
+
+    For every segment, branch, metric and distinct value, the result contains the
+    number of clients with the value in `count`.
+    """
+    return dedent(
+        f"""
+        SELECT
+            segments.segment,
+            metrics_data.branch,
+            metrics.metric,
+            metrics.value,
+            COUNT(*) AS count
+        FROM `{table}` AS metrics_data
+        CROSS JOIN UNNEST({_segment_structs(segments)}) AS segments
+        CROSS JOIN UNNEST({_metric_structs(schema, metrics)}) AS metrics
+        WHERE segments.in_segment AND metrics_data.branch IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def _aggregate_rows(
+    aggregates: pa.Table, segment: str, metric: str, experiment: ExperimentConfiguration
+) -> pd.DataFrame:
+    """
+    Returns the aggregates of a metric in the segment, with the branches in the order of
+    the experiment's branches; unknown branches come last.
+
+    The rows of summary tables have no order, so without a reference branch, the order of
+    the branches decides which branch is the base of each comparison.
+    """
+    rows = aggregates.filter(
+        pc.and_(pc.equal(aggregates["segment"], segment), pc.equal(aggregates["metric"], metric))
+    ).to_pandas()
+    order = {branch.slug: i for i, branch in enumerate(experiment.branches)}
+    ranks = rows["branch"].map(order).fillna(len(order))
+    return rows.iloc[ranks.argsort(kind="stable")].reset_index(drop=True)
+
+
+@dask.delayed
+def calculate_aggregate_statistics(
+    aggregates: pa.Table,
+    segment: str,
+    metric: Summary,
+    experiment: ExperimentConfiguration,
+) -> StatisticResultCollection:
+    """
+    Run a statistic on the aggregates of a metric in segment.
+    """
+    rows = _aggregate_rows(aggregates, segment, metric.metric.name, experiment)
+    if rows.empty:
+        return StatisticResultCollection([])
+    return metric.statistic.apply_aggregates(rows, metric.metric.name, experiment).set_segment(
+        segment
+    )
+
+
+@dask.delayed
+def calculate_histogram_statistics(
+    histograms: pa.Table,
+    segment: str,
+    metric: Summary,
+    experiment: ExperimentConfiguration,
+) -> StatisticResultCollection:
+    """
+    Run a statistic on the histograms of a discrete metric in segment.
+    """
+    rows = _aggregate_rows(histograms, segment, metric.metric.name, experiment)
+    if rows.empty:
+        return StatisticResultCollection([])
+    return metric.statistic.apply_histograms(rows, metric.metric.name, experiment).set_segment(
+        segment
+    )
+
+
+@dask.delayed
+def aggregate_counts(
+    aggregates: pa.Table, segment: str, experiment: ExperimentConfiguration
+) -> StatisticResultCollection:
+    """Count and missing count statistics, from aggregates."""
+    rows = _aggregate_rows(aggregates, segment, "identity", experiment)
+    counts = StatisticResultCollection.from_columns(
+        metric="identity",
+        statistic="count",
+        branch=rows["branch"].to_numpy(),
+        point=rows["n"].to_numpy(),
+    )
+    return _with_missing_branches(counts, experiment).set_segment(segment)
@@ -1,6 +1,8 @@
+import io
 import re
+import threading
 import time
-from typing import Dict, Iterable, Mapping, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
 
 import attr
 import google.cloud.bigquery
@@ -8,10 +10,39 @@ import google.cloud.bigquery.client
 import google.cloud.bigquery.dataset
 import google.cloud.bigquery.job
 import google.cloud.bigquery.table
+import google.cloud.exceptions
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from google.cloud.bigquery_storage import BigQueryReadClient
 
 from . import AnalysisPeriod, bq_normalize_name
+from .table_cache import TableCache
+
+JOB_POLL_INTERVAL = 5  # seconds
+
+# Google API clients are expensive to set up, so they are shared by all BigQueryClients
+# of a process. They are not stored on BigQueryClient instances, which keeps them picklable
+# and lets every dask worker process set up its own clients lazily.
+_clients_lock = threading.Lock()
+_clients: Dict[str, google.cloud.bigquery.client.Client] = {}
+_storage_clients: List[BigQueryReadClient] = []
+
+
+def _shared_client(project: str) -> google.cloud.bigquery.client.Client:
+    """Returns the process-wide BigQuery client of the project."""
+    with _clients_lock:
+        if project not in _clients:
+            _clients[project] = google.cloud.bigquery.client.Client(project)
+        return _clients[project]
+
+
+def _shared_storage_client() -> BigQueryReadClient:
+    """Returns the process-wide BigQuery Storage API client."""
+    with _clients_lock:
+        if not _storage_clients:
+            _storage_clients.append(BigQueryReadClient())
+        return _storage_clients[0]
 
 
 @attr.s(auto_attribs=True, slots=True)
@@ -20,19 +51,65 @@ class BigQueryClient:
     dataset: str
     _client: Optional[google.cloud.bigquery.client.Client] = None
     _storage_client: Optional[BigQueryReadClient] = None
+    _cache: Optional[TableCache] = attr.Factory(TableCache.from_env)
+
+    @property
+    def client(self) -> google.cloud.bigquery.client.Client:
+        return self._client or _shared_client(self.project)
 
     @property
-    def client(self):
-        self._client = self._client or google.cloud.bigquery.client.Client(self.project)
-        return self._client
+    def storage_client(self) -> BigQueryReadClient:
+        return self._storage_client or _shared_storage_client()
+
+    def table_to_dataframe(
+        self, table: str, columns: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Return all rows of the specified table as a dataframe.
+
+        If columns are specified, only those columns are downloaded;
+        columns that don't exist in the table are ignored.
+        """
+        return self.table_to_arrow(table, columns).to_pandas(split_blocks=True)
 
-    def table_to_dataframe(self, table: str) -> pd.DataFrame:
-        """Return all rows of the specified table as a dataframe."""
-        self._storage_client = self._storage_client or BigQueryReadClient()
+    def table_to_arrow(self, table: str, columns: Optional[Iterable[str]] = None) -> pa.Table:
+        """
+        Return all rows of the specified table as an Arrow table.
 
+        If columns are specified, only those columns are downloaded;
+        columns that don't exist in the table are ignored.
+        """
         table_ref = self.client.get_table(f"{self.project}.{self.dataset}.{table}")
-        rows = self.client.list_rows(table_ref)
-        return rows.to_dataframe(bqstorage_client=self._storage_client)
+        selected_fields = None
+        if columns is not None:
+            columns = set(columns)
+            selected_fields = [field for field in table_ref.schema if field.name in columns]
+
+        cache_key = None
+        if self._cache is not None:
+            # tables are re-written in place, so the cache is keyed by their version; the
+            # modification time has millisecond resolution, unlike the last_updated label
+            version = f"{table_ref.modified.isoformat()}/{table_ref.num_rows}"
+            cache_key = self._cache.key(
+                table_ref.full_table_id,
+                version,
+                [field.name for field in selected_fields] if selected_fields is not None else None,
+            )
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        rows = self.client.list_rows(table_ref, selected_fields=selected_fields)
+        result = rows.to_arrow(bqstorage_client=self.storage_client)
+
+        if self._cache is not None and cache_key is not None:
+            self._cache.put(cache_key, result)
+
+        return result
+
+    def table_schema(self, table: str) -> List[google.cloud.bigquery.SchemaField]:
+        """Returns the schema of the specified table."""
+        return self.client.get_table(f"{self.project}.{self.dataset}.{table}").schema
 
     def add_labels_to_table(self, table_name: str, labels: Mapping[str, str]) -> None:
         """Adds the provided labels to the table."""
@@ -59,12 +136,41 @@ class BigQueryClient:
             {"last_updated": self._current_timestamp_label()},
         )
 
+    def load_table_from_arrow(
+        self, table: pa.Table, destination: str, job_config: google.cloud.bigquery.LoadJobConfig
+    ):
+        """Loads an Arrow table into the destination table, as Parquet."""
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        buffer.seek(0)
+
+        job_config.source_format = google.cloud.bigquery.SourceFormat.PARQUET
+        destination_table = f"{self.project}.{self.dataset}.{destination}"
+        # wait for the job to complete
+        self.client.load_table_from_file(buffer, destination_table, job_config=job_config).result()
+
+        # add a label with the current timestamp to the table
+        self.add_labels_to_table(
+            destination,
+            {"last_updated": self._current_timestamp_label()},
+        )
+
     def execute(
         self,
         query: str,
         destination_table: Optional[str] = None,
         write_disposition: Optional[google.cloud.bigquery.job.WriteDisposition] = None,
     ) -> None:
+        job = self.submit(query, destination_table, write_disposition)
+        self.wait(job, destination_table)
+
+    def submit(
+        self,
+        query: str,
+        destination_table: Optional[str] = None,
+        write_disposition: Optional[google.cloud.bigquery.job.WriteDisposition] = None,
+    ) -> google.cloud.bigquery.job.QueryJob:
+        """Starts the query without waiting for it to finish."""
         dataset = google.cloud.bigquery.dataset.DatasetReference.from_string(
             self.dataset,
             default_project=self.project,
@@ -78,8 +184,12 @@ class BigQueryClient:
             kwargs["write_disposition"] = write_disposition
 
         config = google.cloud.bigquery.job.QueryJobConfig(default_dataset=dataset, **kwargs)
-        job = self.client.query(query, config)
-        # block on result
+        return self.client.query(query, config)
+
+    def wait(
+        self, job: google.cloud.bigquery.job.QueryJob, destination_table: Optional[str] = None
+    ) -> None:
+        """Blocks until the submitted query has finished; raises if the query failed."""
         job.result(max_results=1)
 
         if destination_table:
@@ -89,6 +199,14 @@ class BigQueryClient:
                 {"last_updated": self._current_timestamp_label()},
             )
 
+    def view_query(self, view: str) -> Optional[str]:
+        """Returns the query that defines the view or None if the view doesn't exist."""
+        try:
+            table = self.client.get_table(f"{self.project}.{self.dataset}.{view}")
+        except google.cloud.exceptions.NotFound:
+            return None
+        return table.view_query
+
     def tables_matching_regex(self, regex: str):
         """Returns a list of tables with names matching the specified pattern."""
         table_name_re = re.compile(regex)
@@ -102,7 +220,8 @@ class BigQueryClient:
         perpetually stale."""
         normalized_slug = bq_normalize_name(normandy_slug)
         analysis_periods = "|".join([p.value for p in AnalysisPeriod])
-        table_name_re = f"^(statistics_)?{normalized_slug}_({analysis_periods})_.*$"
+        prefixes = "statistics_|aggregates_|histograms_"
+        table_name_re = f"^({prefixes})?{normalized_slug}_({analysis_periods})_.*$"
         tables = self.tables_matching_regex(table_name_re)
         timestamp = self._current_timestamp_label()
         for table in tables:
@@ -111,3 +230,27 @@ class BigQueryClient:
     def delete_table(self, table_id: str) -> None:
         """Delete the table."""
         self.client.delete_table(table_id, not_found_ok=True)
+
+
+def jobs_as_completed(
+    jobs: Iterable[google.cloud.bigquery.job.QueryJob], poll_interval: float = JOB_POLL_INTERVAL
+) -> Iterator[google.cloud.bigquery.job.QueryJob]:
+    """
+    Yields the submitted jobs in the order in which they finish.
+
+    Jobs that are added to `jobs` while iterating, like follow-up queries of finished
+    jobs, are waited for, too.
+    """
+    finished = set()
+    while True:
+        pending = [job for job in jobs if job not in finished]
+        if not pending:
+            return
+
+        done = [job for job in pending if job.done()]
+        for job in done:
+            finished.add(job)
+            yield job
+
+        if not done:
+            time.sleep(poll_interval)
@@ -29,6 +29,7 @@ from .analysis import Analysis
 from .argo import submit_workflow
 from .bigquery_client import BigQueryClient
 from .config import AnalysisConfiguration, AnalysisSpec
+from .dask_cluster import DaskCluster
 from .dryrun import DryRunFailedError
 from .errors import ExplicitSkipException, ValidationException
 from .experimenter import ExperimentCollection
@@ -36,7 +37,7 @@ from .export_json import export_statistics_tables
 from .external_config import ExternalConfigCollection
 from .logging.bigquery_log_handler import BigQueryLogHandler
 from .metadata import export_metadata
-from .util import inclusive_date_range
+from .schedule import AnalysisSchedule
 
 
 def setup_logger(
@@ -144,6 +145,20 @@ class SerialExecutorStrategy:
     config_getter: Callable[
         [], ExternalConfigCollection
     ] = ExternalConfigCollection.from_github_repo
+    # analyse all dates of an experiment with a single Analysis.run_range call
+    multi_date: bool = False
+
+    def _work_items(
+        self, worklist: Iterable[Tuple[AnalysisConfiguration, datetime]]
+    ) -> List[Tuple[AnalysisConfiguration, List[datetime]]]:
+        """Groups dates of the same experiment if all dates are to be analysed at once."""
+        if not self.multi_date:
+            return [(config, [date]) for config, date in worklist]
+
+        grouped: Dict[str, Tuple[AnalysisConfiguration, List[datetime]]] = {}
+        for config, date in worklist:
+            grouped.setdefault(config.experiment.normandy_slug, (config, []))[1].append(date)
+        return list(grouped.values())
 
     def execute(
         self,
@@ -151,10 +166,13 @@ class SerialExecutorStrategy:
         configuration_map: Optional[Mapping[str, TextIO]] = None,
     ):
         failed = False
-        for config, date in worklist:
+        for config, dates in self._work_items(worklist):
             try:
                 analysis = self.analysis_class(self.project_id, self.dataset_id, config)
-                analysis.run(date)
+                if self.multi_date:
+                    analysis.run_range(min(dates), max(dates))
+                else:
+                    analysis.run(dates[0])
                 export_metadata(config, self.bucket, self.project_id)
             except ValidationException as e:
                 # log custom Jetstream exceptions but let the workflow succeed;
@@ -200,30 +218,70 @@ class AnalysisExecutor:
             [], ExternalConfigCollection
         ] = ExternalConfigCollection.from_github_repo,
         today: Optional[datetime] = None,
+        start_date: Optional[datetime] = None,
     ) -> bool:
-        run_configs = self._experiment_configs_to_analyse(experiment_getter, config_getter)
         worklist = []
 
+        for config, schedule in self.schedules(
+            experiment_getter=experiment_getter,
+            config_getter=config_getter,
+            today=today,
+            start_date=start_date,
+        ):
+            run_dates = schedule.dates
+            if config.experiment.start_date is None and not isinstance(self.date, AllType):
+                # nothing can be planned; let the analysis report why it cannot run
+                run_dates = [self.date]
+
+            for run_date in run_dates:
+                assert config.experiment.normandy_slug
+                worklist.append((config, run_date))
+
+            if self.recreate_enrollments:
+                self._delete_enrollment_table(config.experiment)
+
+        # all analyses of the worklist share one dask cluster, which is shut down afterwards
+        with DaskCluster():
+            return strategy.execute(worklist, self.configuration_map)
+
+    def schedules(
+        self,
+        *,
+        experiment_getter: Callable[
+            [], ExperimentCollection
+        ] = ExperimentCollection.from_experimenter,
+        config_getter: Callable[
+            [], ExternalConfigCollection
+        ] = ExternalConfigCollection.from_github_repo,
+        today: Optional[datetime] = None,
+        start_date: Optional[datetime] = None,
+    ) -> List[Tuple[AnalysisConfiguration, AnalysisSchedule]]:
+        """Plans the analysis windows that close for each experiment that is to be analysed."""
+        run_configs = self._experiment_configs_to_analyse(experiment_getter, config_getter)
+        schedules = []
+
         for config in run_configs:
-            if self.date == All:
+            if isinstance(self.date, AllType):
                 today = today or self._today()
                 end_date = today
                 if config.experiment.end_date:
                     end_date = config.experiment.end_date + timedelta(days=1)
 
                 end_date = min(end_date, today)
-                run_dates = inclusive_date_range(config.experiment.start_date, end_date)
+                first_date = config.experiment.start_date
+                if first_date and start_date:
+                    first_date = max(first_date, start_date)
             else:
-                run_dates = [self.date]
-
-            for run_date in run_dates:
-                assert config.experiment.normandy_slug
-                worklist.append((config, run_date))
+                first_date = end_date = self.date
 
-            if self.recreate_enrollments:
-                self._delete_enrollment_table(config.experiment)
+            if first_date is None:
+                schedules.append((config, AnalysisSchedule()))
+            else:
+                schedules.append(
+                    (config, AnalysisSchedule.for_config(config, first_date, end_date))
+                )
 
-        return strategy.execute(worklist, self.configuration_map)
+        return schedules
 
     def _delete_enrollment_table(self, experiment: mozanalysis.experiment.Experiment) -> None:
         """Deletes all enrollment table associated with the experiment."""
@@ -543,6 +601,98 @@ def run_argo(
     ).execute(strategy=strategy)
 
 
+@cli.command()
+@project_id_option
+@dataset_id_option
+@click.option(
+    "--start_date",
+    "--start-date",
+    type=ClickDate(),
+    help="First date for which experiments should be analyzed; "
+    + "defaults to the start of the experiment",
+    metavar="YYYY-MM-DD",
+)
+@click.option(
+    "--end_date",
+    "--end-date",
+    type=ClickDate(),
+    help="Last date for which experiments should be analyzed; defaults to yesterday",
+    metavar="YYYY-MM-DD",
+)
+@click.option(
+    "--experiment_slug",
+    "--experiment-slug",
+    help="Experimenter or Normandy slug of the experiment to (re)run analysis for",
+    required=True,
+)
+@bucket_option
+@secret_config_file_option
+@recreate_enrollments_option
+def run_range(
+    project_id,
+    dataset_id,
+    start_date,
+    end_date,
+    experiment_slug,
+    bucket,
+    config_file,
+    recreate_enrollments,
+):
+    """Runs analysis for all windows that close between two dates in a single process."""
+    analysis_executor = AnalysisExecutor(
+        project_id=project_id,
+        dataset_id=dataset_id,
+        bucket=bucket,
+        date=All,
+        experiment_slugs=[experiment_slug],
+        configuration_map={experiment_slug: config_file} if config_file else None,
+        recreate_enrollments=recreate_enrollments,
+    )
+
+    success = analysis_executor.execute(
+        strategy=SerialExecutorStrategy(project_id, dataset_id, bucket, multi_date=True),
+        today=end_date,
+        start_date=start_date,
+    )
+
+    sys.exit(0 if success else 1)
+
+
+@cli.command()
+@project_id_option
+@dataset_id_option
+@click.option(
+    "--date",
+    type=ClickDate(),
+    help="Date for which the analysis schedule should be planned; defaults to all dates",
+    metavar="YYYY-MM-DD",
+)
+@experiment_slug_option
+@bucket_option
+def plan(project_id, dataset_id, date, experiment_slug, bucket):
+    """Prints the analysis windows that would be computed, without running anything."""
+    schedules = AnalysisExecutor(
+        project_id=project_id,
+        dataset_id=dataset_id,
+        bucket=bucket,
+        date=date or All,
+        experiment_slugs=[experiment_slug] if experiment_slug else All,
+    ).schedules()
+
+    for config, schedule in schedules:
+        for task in schedule.tasks:
+            click.echo(
+                " ".join(
+                    [
+                        config.experiment.normandy_slug,
+                        task.date.strftime("%Y-%m-%d"),
+                        task.period.value,
+                        str(task.window_index),
+                    ]
+                )
+            )
+
+
 @cli.command("rerun")
 @experiment_slug_option
 @project_id_option
@@ -571,7 +721,7 @@ def rerun(
     recreate_enrollments,
 ):
     """Rerun all available analyses for a specific experiment."""
-    strategy = SerialExecutorStrategy(project_id, dataset_id, bucket)
+    strategy = SerialExecutorStrategy(project_id, dataset_id, bucket, multi_date=True)
 
     if argo:
         strategy = ArgoExecutorStrategy(
@@ -634,7 +784,7 @@ def rerun_config_changed(
 ):
     """Rerun all available analyses for experiments with new or updated config files."""
 
-    strategy = SerialExecutorStrategy(project_id, dataset_id, bucket)
+    strategy = SerialExecutorStrategy(project_id, dataset_id, bucket, multi_date=True)
 
     # get experiment-specific external configs
     external_configs = ExternalConfigCollection.from_github_repo()
@@ -295,6 +295,10 @@ class ExperimentConfiguration:
     def skip(self) -> bool:
         return self.experiment_spec.skip
 
+    @property
+    def aggregate_pushdown(self) -> bool:
+        return self.experiment_spec.aggregate_pushdown
+
     # see https://stackoverflow.com/questions/50888391/pickle-of-object-with-getattr-method-in-
     # python-returns-typeerror-object-no
     def __getstate__(self):
@@ -324,6 +328,8 @@ class ExperimentSpec:
     end_date: Optional[str] = attr.ib(default=None, validator=_validate_yyyy_mm_dd)
     segments: List[SegmentReference] = attr.Factory(list)
     skip: bool = False
+    # compute counts and binomial statistics from aggregates computed in BigQuery
+    aggregate_pushdown: bool = False
 
     @staticmethod
     def parse_date(yyyy_mm_dd: Optional[str]) -> Optional[dt.datetime]:
@@ -354,6 +360,9 @@ class MetricDefinition:
     The `select_expression` of the metric may use Jinja2 template syntax to refer to the
     aggregation helper functions defined in `mozanalysis.metrics`, like
         '{{agg_any("payload.processes.scalars.some_boolean_thing")}}'
+
+    Metrics with few distinct values, like days of use, can be marked as `discrete`, so
+    statistics that support it are computed from per-branch histograms of the values.
     """
 
     name: str  # implicit in configuration
@@ -363,6 +372,7 @@ class MetricDefinition:
     friendly_name: Optional[str] = None
     description: Optional[str] = None
     bigger_is_better: bool = True
+    discrete: bool = False
 
     def resolve(self, spec: "AnalysisSpec", experiment: ExperimentConfiguration) -> List[Summary]:
         if self.select_expression is None or self.data_source is None:
@@ -411,6 +421,7 @@ class MetricDefinition:
                     metric=metric,
                     statistic=statistic.from_dict(stats_params),
                     pre_treatments=pre_treatments,
+                    discrete=self.discrete,
                 )
             )
 
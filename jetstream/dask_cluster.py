@@ -0,0 +1,107 @@
+import atexit
+import logging
+import os
+from typing import List, Optional
+
+import attr
+from dask.distributed import Client, LocalCluster
+
+logger = logging.getLogger(__name__)
+
+DASK_DASHBOARD_ADDRESS = "127.0.0.1:8782"
+DASK_N_PROCESSES = int(os.getenv("JETSTREAM_PROCESSES", 0)) or None  # Defaults to number of CPUs
+DASK_WORKER_TIMEOUT = 120  # seconds to wait for workers to come up
+
+# clusters entered as context managers; the innermost one is used by analyses
+_active_clusters: List["DaskCluster"] = []
+_default_cluster: Optional["DaskCluster"] = None
+
+
+@attr.s(auto_attribs=True, eq=False)
+class DaskCluster:
+    """
+    Manages the lifecycle of the dask cluster and client statistics are computed on.
+
+    The cluster is only started once a client is requested, so entering the context
+    manager is cheap for executors that never compute anything locally.
+    """
+
+    dashboard_address: str = DASK_DASHBOARD_ADDRESS
+    n_workers: Optional[int] = DASK_N_PROCESSES
+    worker_timeout: int = DASK_WORKER_TIMEOUT
+    _cluster: Optional[LocalCluster] = None
+    _client: Optional[Client] = None
+
+    @property
+    def client(self) -> Client:
+        """Returns a client connected to a running cluster; (re-)starts the cluster if needed."""
+        if self._client is not None and not self.healthy():
+            logger.warning("Dask cluster is unhealthy; restarting")
+            self.close()
+
+        if self._client is None:
+            self._start()
+
+        assert self._client is not None  # for mypy
+        return self._client
+
+    def _start(self) -> None:
+        self._cluster = LocalCluster(
+            dashboard_address=self.dashboard_address,
+            processes=True,
+            threads_per_worker=1,
+            n_workers=self.n_workers,
+        )
+        self._client = Client(self._cluster)
+        # block until all workers have started, so the first tasks don't pay for it
+        self._client.wait_for_workers(len(self._cluster.workers), timeout=self.worker_timeout)
+        logger.info("Started dask cluster with %d workers", len(self._cluster.workers))
+
+    def healthy(self) -> bool:
+        """Returns whether the client is connected and the cluster has workers."""
+        if self._client is None:
+            return False
+
+        try:
+            return self._client.status == "running" and bool(
+                self._client.scheduler_info()["workers"]
+            )
+        except Exception:
+            logger.exception("Dask cluster health check failed")
+            return False
+
+    def close(self) -> None:
+        """Shuts down the client and cluster; a new cluster is started on next use."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+        if self._cluster is not None:
+            self._cluster.close()
+            self._cluster = None
+
+    def __enter__(self) -> "DaskCluster":
+        _active_clusters.append(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _active_clusters.remove(self)
+        self.close()
+
+
+def current_cluster() -> DaskCluster:
+    """
+    Returns the cluster of the innermost active `DaskCluster` context.
+
+    Outside of a context, a process-wide cluster is used that is shut down on exit.
+    """
+    global _default_cluster
+
+    if _active_clusters:
+        return _active_clusters[-1]
+
+    if _default_cluster is None:
+        _default_cluster = DaskCluster()
+        atexit.register(_default_cluster.close)
+
+    return _default_cluster
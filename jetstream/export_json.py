@@ -9,6 +9,7 @@ import google.cloud.bigquery as bigquery
 import google.cloud.storage as storage
 
 from jetstream import AnalysisPeriod, bq_normalize_name
+from jetstream.bigquery_client import BigQueryClient
 
 logger = logging.getLogger(__name__)
 
@@ -127,7 +128,7 @@ def export_statistics_tables(
     project_id: str, dataset_id: str, bucket: str, experiment_slug: Optional[str] = None
 ):
     """Export statistics tables that have been modified or added to GCS as JSON."""
-    bigquery_client = bigquery.Client(project_id)
+    bigquery_client = BigQueryClient(project_id, dataset_id).client
     storage_client = storage.Client()
     target_path = "statistics"
 
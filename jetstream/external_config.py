@@ -11,10 +11,10 @@ from typing import List, Optional, Union
 import attr
 import toml
 from git import Repo
-from google.cloud import bigquery
 from pytz import UTC
 
 from jetstream.analysis import Analysis
+from jetstream.bigquery_client import BigQueryClient
 from jetstream.config import AnalysisSpec, OutcomeSpec, PLATFORM_CONFIGS
 from jetstream.util import TemporaryDirectory
 import jetstream.experimenter
@@ -148,7 +148,7 @@ class ExternalConfigCollection:
         Return external configs that have been updated/added and
         with associated BigQuery tables being out of date.
         """
-        client = bigquery.Client(bq_project)
+        client = BigQueryClient(bq_project, bq_dataset).client
         job = client.query(
             fr"""
             SELECT
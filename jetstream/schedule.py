@@ -0,0 +1,112 @@
+"""
+Plans which analysis windows of an experiment close on which dates.
+
+Analysis windows of a time series period are counted from the last enrollment date:
+the k-th window of a period with a length of L days closes
+`last_enrollment_date + k * L - 1` days after the experiment started,
+so the full set of `(date, period, window_index)` tasks can be computed up front
+without building TimeLimits for every single date.
+"""
+
+import datetime as dt
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+import attr
+
+from . import AnalysisPeriod
+
+if TYPE_CHECKING:
+    from .config import AnalysisConfiguration, ExperimentConfiguration
+
+PERIOD_LENGTH_DAYS = {
+    AnalysisPeriod.DAY: 1,
+    AnalysisPeriod.WEEK: 7,
+    AnalysisPeriod.DAYS_28: 28,
+}
+
+
+def closing_window_index(
+    experiment: "ExperimentConfiguration", period: AnalysisPeriod, date: dt.datetime
+) -> Optional[int]:
+    """
+    Returns the 1-based index of the analysis window of `period` that closes on `date`.
+    Returns None if no window closes on that date.
+    """
+    if experiment.start_date is None:
+        return None
+
+    if period == AnalysisPeriod.OVERALL:
+        if (
+            experiment.end_date is None
+            or experiment.end_date.date() != date.date()
+            or experiment.status != "Complete"
+        ):
+            return None
+        return 1
+
+    last_enrollment_date = experiment.start_date.date() + dt.timedelta(
+        days=experiment.proposed_enrollment
+    )
+    days_of_data = (date.date() - last_enrollment_date).days + 1
+    length = PERIOD_LENGTH_DAYS[period]
+
+    if days_of_data <= 0 or days_of_data % length != 0:
+        return None
+
+    return days_of_data // length
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class AnalysisTask:
+    """An analysis window that closes on a specific date."""
+
+    date: dt.datetime
+    period: AnalysisPeriod
+    window_index: int
+
+
+@attr.s(auto_attribs=True)
+class AnalysisSchedule:
+    """The analysis windows of an experiment that close in a range of dates."""
+
+    tasks: List[AnalysisTask] = attr.Factory(list)
+
+    @classmethod
+    def for_experiment(
+        cls,
+        experiment: "ExperimentConfiguration",
+        periods: Iterable[AnalysisPeriod],
+        start_date: dt.datetime,
+        end_date: dt.datetime,
+    ) -> "AnalysisSchedule":
+        """
+        Plans the analysis windows that close between start_date and end_date (inclusive).
+        """
+        if experiment.start_date is None:
+            return cls()
+
+        periods = list(periods)
+        tasks = []
+        for days in range((end_date - start_date).days + 1):
+            date = start_date + dt.timedelta(days=days)
+            for period in periods:
+                window_index = closing_window_index(experiment, period, date)
+                if window_index is not None:
+                    tasks.append(AnalysisTask(date, period, window_index))
+
+        return cls(tasks)
+
+    @classmethod
+    def for_config(
+        cls, config: "AnalysisConfiguration", start_date: dt.datetime, end_date: dt.datetime
+    ) -> "AnalysisSchedule":
+        """Plans the analysis windows for all periods the configuration defines metrics for."""
+        return cls.for_experiment(config.experiment, config.metrics.keys(), start_date, end_date)
+
+    @property
+    def dates(self) -> List[dt.datetime]:
+        """Dates on which at least one analysis window closes."""
+        return sorted({task.date for task in self.tasks})
+
+    def tasks_on(self, date: dt.datetime) -> List[AnalysisTask]:
+        return [task for task in self.tasks if task.date.date() == date.date()]
@@ -1,22 +1,38 @@
 import logging
-import math
 import numbers
+import os
 import re
+import zlib
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import attr
-import cattr
-import mozanalysis.bayesian_stats.bayesian_bootstrap
+import mozanalysis.bayesian_stats
 import mozanalysis.bayesian_stats.binary
-import mozanalysis.frequentist_stats.bootstrap
 import mozanalysis.metrics
 import numpy as np
-import statsmodels.api as sm
+import pyarrow as pa
+import scipy.signal
+import scipy.stats
 from google.cloud import bigquery
-from pandas import DataFrame, Series
-from statsmodels.distributions.empirical_distribution import ECDF
+from pandas import DataFrame, Series, factorize
+from statsmodels.nonparametric import bandwidths
+from statsmodels.nonparametric.kde import kernel_switch as kde_kernels
 
 from .pre_treatment import PreTreatment
 
@@ -39,13 +55,31 @@ class Summary:
     metric: mozanalysis.metrics.Metric
     statistic: "Statistic"
     pre_treatments: List[PreTreatment] = attr.Factory(list)
+    # whether the metric has few distinct values, so it can be summarized as histograms
+    discrete: bool = False
 
     def run(
         self,
-        data: DataFrame,
+        data: Union[DataFrame, pa.Table, "BranchPartitionedFrame"],
         experiment: "config.ExperimentConfiguration",
     ) -> "StatisticResultCollection":
-        """Apply the statistic transformation for data related to the specified metric."""
+        """
+        Apply the statistic transformation for data related to the specified metric.
+
+        Arrow tables are converted to pandas, restricted to the branch and metric columns.
+        Partitioned frames are only converted if there are pre-treatments.
+        """
+        if isinstance(data, BranchPartitionedFrame):
+            if self.metric.name not in data.columns:
+                return StatisticResultCollection([])
+            if not self.pre_treatments:
+                return self.statistic.apply_partitioned(data, self.metric.name, experiment)
+            data = data.to_frame(self.metric.name)
+
+        if isinstance(data, pa.Table):
+            columns = [c for c in ("branch", self.metric.name) if c in data.column_names]
+            data = data.select(columns).to_pandas(split_blocks=True)
+
         for pre_treatment in self.pre_treatments:
             data = pre_treatment.apply(data, self.metric.name)
 
@@ -70,9 +104,13 @@ class StatisticResult:
     lower: Optional[float] = None
     upper: Optional[float] = None
     segment: Optional[str] = None
+    # how statistics that choose between methods computed the result, e.g. "normal"
+    method: Optional[str] = None
+    # the number of bootstrap replicates the result was computed from
+    num_samples: Optional[int] = None
 
     def __attrs_post_init__(self):
-        for k in ("ci_width", "point", "lower", "upper"):
+        for k in ("ci_width", "point", "lower", "upper", "num_samples"):
             v = getattr(self, k)
             if v is None:
                 continue
@@ -91,36 +129,575 @@ class StatisticResult:
         bigquery.SchemaField("lower", "FLOAT64"),
         bigquery.SchemaField("upper", "FLOAT64"),
         bigquery.SchemaField("segment", "STRING"),
+        bigquery.SchemaField("method", "STRING"),
+        bigquery.SchemaField("num_samples", "INT64"),
     )
 
 
-@attr.s(auto_attribs=True)
+NUMERIC_SCALE = 6  # decimal places of the parameters written to BigQuery
+_STRING_FIELDS = (
+    "metric",
+    "statistic",
+    "branch",
+    "comparison",
+    "comparison_to_branch",
+    "segment",
+    "method",
+)
+# integer fields are stored as floats, so NaN can mark missing values
+_FLOAT_FIELDS = ("parameter", "ci_width", "point", "lower", "upper", "num_samples")
+_REQUIRED_FIELDS = ("metric", "statistic", "branch")
+
+
+def _string_column(values: Any, length: int) -> np.ndarray:
+    column = np.empty(length, dtype=object)
+    column[:] = values
+    return column
+
+
+def _float_column(name: str, values: Any, length: int) -> np.ndarray:
+    array = np.asarray(values)
+    if array.dtype.kind == "O" or (name == "parameter" and array.dtype.kind == "U"):
+        # parameters may be given as decimals or decimal strings
+        allowed = (numbers.Number, str) if name == "parameter" else numbers.Number
+        flat = array.ravel()
+        for v in flat:
+            if v is not None and not isinstance(v, allowed):
+                raise ValueError(f"Expected a number for {name}; got {repr(v)}")
+        array = np.array([np.nan if v is None else float(v) for v in flat])
+    elif array.dtype.kind not in "biuf":
+        raise ValueError(f"Expected a number for {name}; got {repr(values)}")
+    return np.broadcast_to(array.astype(float), (length,)).copy()
+
+
+def _numeric_array(values: np.ndarray) -> pa.Array:
+    """
+    Converts floats to BigQuery NUMERIC values, rounded to NUMERIC_SCALE decimal places
+    exactly like `round(Decimal(value), NUMERIC_SCALE)`. Non-finite values become nulls.
+    """
+    numeric_type = pa.decimal128(38, 9)
+    finite = np.isfinite(values)
+    scaled = np.where(finite, values, 0) * 10**NUMERIC_SCALE
+    rounded = np.rint(scaled)
+
+    # the scaled values are inexact, so values close to a tie or beyond the range of exact
+    # integers are rounded with decimals
+    inexact = (np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) <= 4 * np.spacing(scaled)) | (
+        np.abs(scaled) >= 2**53
+    )
+    exact_values = {
+        i: int(round(Decimal(values[i]), NUMERIC_SCALE).scaleb(NUMERIC_SCALE))
+        for i in np.flatnonzero(inexact & finite)
+    }
+    if any(abs(v) >= 2**63 // 10**3 for v in exact_values.values()):
+        return pa.array(
+            [
+                round(Decimal(v), NUMERIC_SCALE) if is_finite else None
+                for v, is_finite in zip(values.tolist(), finite)
+            ],
+            type=numeric_type,
+        )
+
+    unscaled = rounded.astype(np.int64)
+    for i, v in exact_values.items():
+        unscaled[i] = v
+    unscaled *= 10 ** (numeric_type.scale - NUMERIC_SCALE)
+
+    # 128 bit little-endian two's complement integers
+    data = np.empty((len(values), 2), dtype=np.int64)
+    data[:, 0] = unscaled
+    data[:, 1] = np.where(unscaled < 0, -1, 0)
+    validity = pa.py_buffer(np.packbits(finite, bitorder="little"))
+    return pa.Array.from_buffers(numeric_type, len(values), [validity, pa.py_buffer(data)])
+
+
 class StatisticResultCollection:
     """
     Represents a set of statistics result data.
+
+    Results are stored column-wise, with one array per `StatisticResult` field, and are
+    serialized to the `StatisticResult.bq_schema` without creating a Python object per
+    result. `data` provides the results as `StatisticResult` objects for compatibility.
     """
 
-    data: List[StatisticResult] = attr.Factory(list)
+    def __init__(self, data: Iterable[StatisticResult] = ()):
+        self._blocks: List[Dict[str, np.ndarray]] = []
+        self._rows: List[StatisticResult] = list(data)
 
-    converter = cattr.Converter()
-    _normalize_decimal: Callable[[Decimal], str] = lambda x: str(round(x, 6).normalize())
-    converter.register_unstructure_hook(Decimal, _normalize_decimal)
-    _suppress_infinites: Callable[[float], Optional[float]] = (
-        lambda x: x if math.isfinite(x) else None
-    )
-    converter.register_unstructure_hook(float, _suppress_infinites)
+    @classmethod
+    def from_columns(cls, **columns: Any) -> "StatisticResultCollection":
+        """
+        Creates results from columns of `StatisticResult` fields.
+
+        Array-like columns hold one value per result; scalars are shared by all results.
+        """
+        unknown = set(columns) - set(_STRING_FIELDS + _FLOAT_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown result fields: {sorted(unknown)}")
+        missing = [f for f in _REQUIRED_FIELDS if f not in columns]
+        if missing:
+            raise TypeError(f"Missing result fields: {missing}")
+
+        lengths = {len(v) for v in columns.values() if np.ndim(v) > 0}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        length = lengths.pop() if lengths else 1
+
+        block = {f: _string_column(columns.get(f), length) for f in _STRING_FIELDS}
+        block.update({f: _float_column(f, columns.get(f), length) for f in _FLOAT_FIELDS})
+
+        collection = cls()
+        collection._blocks.append(block)
+        return collection
+
+    @classmethod
+    def concat(
+        cls, collections: Iterable["StatisticResultCollection"]
+    ) -> "StatisticResultCollection":
+        """Concatenates the results of several collections."""
+        result = cls()
+        for collection in collections:
+            result.extend(collection)
+        return result
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Returns the results as one array per `StatisticResult` field."""
+        if self._rows:
+            rows, self._rows = self._rows, []
+            self._blocks += StatisticResultCollection.from_columns(
+                **{f: [getattr(r, f) for r in rows] for f in _STRING_FIELDS + _FLOAT_FIELDS}
+            )._blocks
+
+        if not self._blocks:
+            return {
+                **{f: np.empty(0, dtype=object) for f in _STRING_FIELDS},
+                **{f: np.empty(0) for f in _FLOAT_FIELDS},
+            }
+
+        if len(self._blocks) > 1:
+            self._blocks = [
+                {f: np.concatenate([b[f] for b in self._blocks]) for f in self._blocks[0]}
+            ]
+        return self._blocks[0]
+
+    @property
+    def data(self) -> List[StatisticResult]:
+        """
+        Returns the results as `StatisticResult` objects; missing numbers are None.
+
+        Parameters are the decimals written to BigQuery, rounded to NUMERIC_SCALE places.
+        """
+        columns = self.columns
+        values = {
+            f: [None if v != v else v for v in columns[f].tolist()] if f in _FLOAT_FIELDS
+            # NaN marks missing numbers
+            else columns[f].tolist()
+            for f in _STRING_FIELDS + _FLOAT_FIELDS
+        }
+        values["parameter"] = _numeric_array(columns["parameter"]).to_pylist()
+        values["num_samples"] = [None if v is None else int(v) for v in values["num_samples"]]
+        return [StatisticResult(**dict(zip(values, row))) for row in zip(*values.values())]
+
+    @data.setter
+    def data(self, data: Iterable[StatisticResult]) -> None:
+        self._blocks = []
+        self._rows = list(data)
+
+    def append(self, result: StatisticResult) -> None:
+        self._rows.append(result)
+
+    def extend(self, other: "StatisticResultCollection") -> None:
+        self.columns  # keep the order of results that were appended before
+        self._blocks.append(dict(other.columns))
+
+    def __len__(self) -> int:
+        return len(self.columns["metric"])
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StatisticResultCollection):
+            return NotImplemented
+        return self.data == other.data
+
+    def __repr__(self) -> str:
+        return f"StatisticResultCollection(data={self.data!r})"
+
+    def to_arrow(self) -> pa.Table:
+        """Returns the results as a table with the `StatisticResult.bq_schema`."""
+        columns = self.columns
+        arrays = {}
+        for field in StatisticResult.bq_schema:
+            values = columns[field.name]
+            if field.field_type == "NUMERIC":
+                arrays[field.name] = _numeric_array(values)
+            elif field.field_type == "FLOAT64":
+                # infinite and NaN values are suppressed
+                arrays[field.name] = pa.array(values, mask=~np.isfinite(values))
+            elif field.field_type == "INT64":
+                arrays[field.name] = pa.array(values, mask=np.isnan(values)).cast(pa.int64())
+            else:
+                arrays[field.name] = pa.array(
+                    [None if v is None else str(v) for v in values], type=pa.string()
+                )
+        return pa.table(arrays)
 
     def to_dict(self) -> Dict[str, Any]:
         """Return statistic results as dict."""
-        return self.converter.unstructure(self)
+        columns = self.to_arrow().to_pydict()
+        rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        for row in rows:
+            if row["parameter"] is not None:
+                row["parameter"] = str(row["parameter"].normalize())
+        return {"data": rows}
 
     def set_segment(self, segment: str) -> "StatisticResultCollection":
         """Sets the `segment` field in-place on all children."""
-        for result in self.data:
-            result.segment = segment
+        columns = self.columns
+        columns["segment"] = _string_column(segment, len(columns["segment"]))
         return self
 
 
+def _distinct_values(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the sorted distinct values, NaN last, and the index of each value among them.
+    Unlike `np.unique` in older numpy versions, all NaNs are a single distinct value.
+    """
+    missing = np.isnan(values)
+    distinct, inverse = np.unique(values[~missing], return_inverse=True)
+    if not missing.any():
+        return distinct, inverse.ravel()
+    indices = np.full(len(values), len(distinct))
+    indices[~missing] = inverse.ravel()
+    return np.append(distinct, np.nan), indices
+
+
+# sorted distinct values of a metric, NaN last, and the number of clients with each value
+Histogram = Tuple[np.ndarray, np.ndarray]
+
+
+@attr.s(auto_attribs=True)
+class CompressedColumn:
+    """
+    A metric column compressed to its distinct values and, for each branch, the number
+    of clients with each value.
+
+    Metric columns are dominated by repeated values, like zero-inflated counts and
+    booleans. Statistics that weight the distinct values by these counts take memory
+    and time proportional to the number of distinct values instead of clients.
+    """
+
+    values: np.ndarray  # sorted distinct values, NaN last
+    weights: Dict[str, np.ndarray]  # number of clients of each branch with each value
+
+    @classmethod
+    def from_frame(cls, df: DataFrame, metric: str) -> "CompressedColumn":
+        """Compresses the metric column of client-level data, with branches in order of rows."""
+        codes, branches = factorize(df.branch)
+        return cls._tally(np.asarray(df[metric], dtype=float), codes, branches)
+
+    @classmethod
+    def from_histograms(cls, histograms: DataFrame) -> "CompressedColumn":
+        """
+        Builds the column from histograms, with a row per branch and distinct `value` and
+        the number of clients with the value in `count`. Branches keep the order of their
+        first rows, which decides the base of comparisons without a reference branch.
+        """
+        codes, branches = factorize(histograms.branch)
+        return cls._tally(
+            histograms["value"].to_numpy(dtype=float),
+            codes,
+            branches,
+            histograms["count"].to_numpy(dtype=float),
+        )
+
+    @classmethod
+    def _tally(
+        cls,
+        values: np.ndarray,
+        codes: np.ndarray,
+        branches: Iterable[str],
+        counts: Optional[np.ndarray] = None,
+    ) -> "CompressedColumn":
+        branches = list(branches)
+        # rows without a branch have a negative code
+        in_branch = codes >= 0
+        distinct, inverse = _distinct_values(values[in_branch])
+        cells = codes[in_branch] * len(distinct) + inverse
+        weights = np.bincount(
+            cells,
+            weights=counts[in_branch] if counts is not None else None,
+            minlength=len(branches) * len(distinct),
+        )
+        weights = weights.astype(np.int64).reshape(len(branches), len(distinct))
+        return cls(distinct, dict(zip(branches, weights)))
+
+    @property
+    def branches(self) -> List[str]:
+        return list(self.weights)
+
+    def sizes(self) -> Dict[str, int]:
+        """Returns the number of clients in each branch."""
+        return {branch: int(weights.sum()) for branch, weights in self.weights.items()}
+
+    def histogram(self, branch: str) -> Histogram:
+        """Returns the distinct values of a branch's clients and their counts."""
+        weights = self.weights[branch]
+        present = weights > 0
+        return self.values[present], weights[present]
+
+    def select(self, branches: Iterable[str]) -> "CompressedColumn":
+        """Returns the column restricted to clients in the branches."""
+        weights = {branch: self.weights[branch] for branch in branches}
+        present = np.zeros(len(self.values), dtype=bool)
+        for branch_weights in weights.values():
+            present |= branch_weights > 0
+        return CompressedColumn(
+            self.values[present], {branch: w[present] for branch, w in weights.items()}
+        )
+
+
+class _SelectedRows(Mapping[str, np.ndarray]):
+    """Columns restricted to some of their rows, which are taken when a column is used."""
+
+    def __init__(self, columns: Mapping[str, np.ndarray], rows: np.ndarray):
+        self._columns = columns
+        self._rows = rows
+        self._selected: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        if metric not in self._selected:
+            self._selected[metric] = self._columns[metric][self._rows]
+        return self._selected[metric]
+
+    def __contains__(self, metric: object) -> bool:
+        return metric in self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+
+@attr.s(auto_attribs=True, eq=False)
+class BranchPartitionedFrame:
+    """
+    Client-level metric columns, partitioned by branch.
+
+    Rows are grouped by branch, in order of the branches' first rows, and keep their
+    order within a branch, so the values of a branch are a contiguous slice of every
+    column. Segments are masks over the rows; `segment` returns a view of a segment's
+    clients that only copies the columns statistics use, and the counts and compressed
+    columns of all segments are computed from shared passes over the frame.
+
+    A frame is built once per metrics table and shared by all statistics. Float values,
+    sorted values, compressed columns and segment views are computed on first use and
+    cached; caches aren't pickled.
+    """
+
+    branches: List[str]
+    offsets: np.ndarray  # the rows of the i-th branch are offsets[i]:offsets[i + 1]
+    columns: Mapping[str, np.ndarray]
+    segments: Dict[str, np.ndarray] = attr.Factory(dict)  # whether each row is in a segment
+    positions: Optional[np.ndarray] = None  # the position of each row in the original data
+    # the frame and segment that a segment view was taken from
+    _view_of: Optional[Tuple["BranchPartitionedFrame", str]] = attr.ib(default=None, repr=False)
+    _cache: Dict[Tuple[str, ...], Any] = attr.ib(factory=dict, init=False, repr=False)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: DataFrame,
+        metrics: Optional[Iterable[str]] = None,
+        segments: Iterable[str] = (),
+    ) -> "BranchPartitionedFrame":
+        """
+        Partitions the metric columns of client-level data, by default all columns other
+        than `branch` and the boolean segment columns. Rows without a branch are dropped.
+        """
+        segments = list(segments)
+        if metrics is None:
+            metrics = [c for c in df.columns if c != "branch" and c not in segments]
+        codes, branches = factorize(df.branch)
+        # rows without a branch have a negative code and are sorted first
+        num_unassigned = np.count_nonzero(codes < 0)
+        order = np.argsort(codes, kind="stable")[num_unassigned:]
+        sizes = np.bincount(codes[codes >= 0], minlength=len(branches))
+        return cls(
+            list(branches),
+            np.concatenate([[0], np.cumsum(sizes)]),
+            {metric: df[metric].to_numpy()[order] for metric in dict.fromkeys(metrics)},
+            # clients with a null segment column aren't in the segment
+            {
+                segment: df[segment].to_numpy(dtype=bool, na_value=False)[order]
+                for segment in segments
+            },
+            order,
+        )
+
+    @classmethod
+    def from_arrow(
+        cls, table: pa.Table, metrics: Iterable[str], segments: Iterable[str] = ()
+    ) -> "BranchPartitionedFrame":
+        """
+        Partitions the metric columns of an Arrow table; missing metrics and segments
+        are skipped.
+        """
+        metrics = [m for m in dict.fromkeys(metrics) if m in table.column_names]
+        segments = [s for s in dict.fromkeys(segments) if s in table.column_names]
+        df = table.select(["branch"] + metrics + segments).to_pandas(split_blocks=True)
+        return cls.from_frame(df, metrics, segments)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # caches are rebuilt by every process that uses the frame
+        state = self.__dict__.copy()
+        state["_cache"] = {}
+        return state
+
+    @property
+    def num_rows(self) -> int:
+        return int(self.offsets[-1])
+
+    def sizes(self) -> Dict[str, int]:
+        """Returns the number of clients in each branch."""
+        return dict(zip(self.branches, np.diff(self.offsets).tolist()))
+
+    def rows(self, branch: str) -> slice:
+        """Returns the slice of rows of a branch."""
+        i = self.branches.index(branch)
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def _cached(self, key: Tuple[str, ...], compute: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def values(self, metric: str, branch: Optional[str] = None) -> np.ndarray:
+        """Returns the values of a metric as floats, of a branch or of all branches."""
+        values = self._cached(
+            ("values", metric), lambda: np.asarray(self.columns[metric], dtype=float)
+        )
+        return values if branch is None else values[self.rows(branch)]
+
+    def sorted_values(self, metric: str, branch: str) -> np.ndarray:
+        """Returns the sorted values of a metric of a branch, NaN last."""
+        return self._cached(
+            ("sorted_values", metric, branch), lambda: np.sort(self.values(metric, branch))
+        )
+
+    def _value_cells(self, metric: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the sorted distinct values of a metric and the cell of each row in a table
+        of branches by distinct values, which compressed columns of all segments share.
+        """
+
+        def compute() -> Tuple[np.ndarray, np.ndarray]:
+            distinct, inverse = _distinct_values(self.values(metric))
+            codes = np.repeat(np.arange(len(self.branches)), np.diff(self.offsets))
+            return distinct, codes * len(distinct) + inverse
+
+        return self._cached(("value_cells", metric), compute)
+
+    def _tally_cells(self, metric: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns the number of clients, optionally of a segment, in each cell."""
+        distinct, cells = self._value_cells(metric)
+        return np.bincount(
+            cells if mask is None else cells[mask],
+            minlength=len(self.branches) * len(distinct),
+        ).reshape(len(self.branches), len(distinct))
+
+    def compressed(self, metric: str) -> CompressedColumn:
+        """Returns the compressed column of a metric."""
+
+        def compute() -> CompressedColumn:
+            if self._view_of is not None:
+                frame, segment = self._view_of
+                return frame._segment_compressed(metric, segment)
+            distinct, _ = self._value_cells(metric)
+            return CompressedColumn(distinct, dict(zip(self.branches, self._tally_cells(metric))))
+
+        return self._cached(("compressed", metric), compute)
+
+    def _segment_compressed(self, metric: str, segment: str) -> CompressedColumn:
+        distinct, _ = self._value_cells(metric)
+        weights = self._tally_cells(metric, self.segments[segment])
+        present = weights.any(axis=0)
+        return CompressedColumn(
+            distinct[present],
+            {
+                branch: weights[self.branches.index(branch), present]
+                for branch in self.segment(segment).branches
+            },
+        )
+
+    def segment_sizes(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the number of clients of each branch in each segment, counted in a single
+        pass over all segments.
+        """
+
+        def compute() -> Dict[str, np.ndarray]:
+            if not self.segments or not self.branches:
+                return {s: np.zeros(len(self.branches), dtype=np.int64) for s in self.segments}
+            masks = np.stack(list(self.segments.values()))
+            sizes = np.add.reduceat(masks, self.offsets[:-1], axis=1, dtype=np.int64)
+            return dict(zip(self.segments, sizes))
+
+        return self._cached(("segment_sizes",), compute)
+
+    def segment(self, segment: str) -> "BranchPartitionedFrame":
+        """
+        Returns a view of the clients in a segment, or the frame itself for "all".
+
+        Branches without clients in the segment are dropped. Like in the segment's rows of
+        the original data, branches are ordered by their first client in the segment.
+        """
+        if segment == "all":
+            return self
+        if segment not in self.segments:
+            raise ValueError(f"Segment {segment} not in metrics table")
+
+        def compute() -> BranchPartitionedFrame:
+            mask = self.segments[segment]
+            sizes = self.segment_sizes()[segment]
+            present = np.flatnonzero(sizes)
+            if self.positions is not None and len(present):
+                first = np.minimum.reduceat(
+                    np.where(mask, self.positions, len(self.positions)), self.offsets[:-1]
+                )
+                present = present[np.argsort(first[present], kind="stable")]
+
+            branches = [self.branches[i] for i in present]
+            rows = [
+                np.flatnonzero(mask[self.rows(branch)]) + self.rows(branch).start
+                for branch in branches
+            ]
+            return BranchPartitionedFrame(
+                branches,
+                np.concatenate([[0], np.cumsum(sizes[present])]),
+                _SelectedRows(self.columns, np.concatenate([np.empty(0, np.int64)] + rows)),
+                view_of=(self, segment),
+            )
+
+        return self._cached(("segment", segment), compute)
+
+    def select(self, branches: Iterable[str]) -> "BranchPartitionedFrame":
+        """Returns a view of the clients in the branches."""
+        branches = list(branches)
+        rows = [self.rows(branch) for branch in branches]
+        selected = [np.arange(r.start, r.stop) for r in rows]
+        return BranchPartitionedFrame(
+            branches,
+            np.concatenate([[0], np.cumsum([r.stop - r.start for r in rows])]),
+            _SelectedRows(self.columns, np.concatenate([np.empty(0, np.int64)] + selected)),
+        )
+
+    def to_frame(self, metric: str) -> DataFrame:
+        """Returns the branch and metric columns as client-level data."""
+        branches = np.repeat(np.array(self.branches, dtype=object), np.diff(self.offsets))
+        return DataFrame({"branch": branches, metric: self.columns[metric]})
+
+
 @attr.s(auto_attribs=True)
 class Statistic(ABC):
     """
@@ -148,38 +725,259 @@ class Statistic(ABC):
         Run statistic on data provided by a DataFrame and return a collection
         of statistic results.
         """
+        if metric not in df:
+            return StatisticResultCollection([])
+
+        def transform(ref_branch: str, excluded: List[str]) -> "StatisticResultCollection":
+            data = df[~df.branch.isin(excluded)] if excluded else df
+            return self.transform(data, metric, ref_branch, experiment)
+
+        return self._compare_branches(
+            list(df.branch.unique()),
+            lambda: self.branch_samples(df, metric),
+            transform,
+            metric,
+            experiment,
+        )
+
+    def apply_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """
+        Run statistic on client-level data partitioned by branch and return a collection
+        of statistic results.
+        """
+        if metric not in frame.columns:
+            return StatisticResultCollection([])
+
+        def transform(ref_branch: str, excluded: List[str]) -> "StatisticResultCollection":
+            data = (
+                frame.select([b for b in frame.branches if b not in excluded])
+                if excluded
+                else frame
+            )
+            return self.transform_partitioned(data, metric, ref_branch, experiment)
+
+        return self._compare_branches(
+            frame.branches,
+            lambda: self.partitioned_samples(frame, metric),
+            transform,
+            metric,
+            experiment,
+        )
+
+    def apply_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """
+        Run statistic on a compressed metric column and return a collection
+        of statistic results.
+        """
+
+        def transform(ref_branch: str, excluded: List[str]) -> "StatisticResultCollection":
+            data = column.select([b for b in column.branches if b not in excluded])
+            return self.transform_compressed(data, metric, ref_branch, experiment)
+
+        return self._compare_branches(
+            column.branches,
+            lambda: self.compressed_samples(column, metric),
+            transform,
+            metric,
+            experiment,
+        )
+
+    def apply_histograms(
+        self,
+        histograms: DataFrame,
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """
+        Run statistic on histograms of a discrete metric and return a collection
+        of statistic results.
+
+        `histograms` has a row per branch and distinct `value`, with the number of
+        clients that have the value in `count`.
+        """
+        return self.apply_compressed(
+            CompressedColumn.from_histograms(histograms), metric, experiment
+        )
+
+    def _compare_branches(
+        self,
+        branch_list: List[str],
+        branch_samples: Callable[[], Optional[Dict[str, Any]]],
+        transform: Callable[[str, List[str]], "StatisticResultCollection"],
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """
+        Compares the branches to the reference branch, or to each branch in turn if the
+        experiment has no reference branch.
 
+        Branches are compared by their samples if `branch_samples` returns any, otherwise
+        `transform` is called with each reference branch and the reference branches
+        before it, which aren't compared again.
+        """
         statistic_result_collection = StatisticResultCollection([])
 
-        if metric in df:
-            branch_list = df.branch.unique()
-            reference_branch = experiment.reference_branch
-            if reference_branch and reference_branch not in branch_list:
-                logger.warning(
-                    f"Branch {reference_branch} not in {branch_list} for {self.name()}.",
+        reference_branch = experiment.reference_branch
+        if reference_branch and reference_branch not in branch_list:
+            logger.warning(
+                f"Branch {reference_branch} not in {branch_list} for {self.name()}.",
+                extra={"experiment": experiment.normandy_slug},
+            )
+            return statistic_result_collection
+
+        if reference_branch is None:
+            ref_branch_list = branch_list
+        else:
+            ref_branch_list = [reference_branch]
+
+        if not ref_branch_list:
+            return statistic_result_collection
+
+        try:
+            samples = branch_samples()
+        except Exception as e:
+            logger.error(
+                f"Error while computing statistic {self.name} for metric {metric}: {e}",
+                extra={"experiment": experiment.normandy_slug},
+            )
+            return statistic_result_collection
+
+        if samples is not None:
+            return self.compare_with_references(samples, metric, ref_branch_list, experiment)
+
+        for i, ref_branch in enumerate(ref_branch_list):
+            try:
+                statistic_result_collection.extend(transform(ref_branch, ref_branch_list[:i]))
+            except Exception as e:
+                logger.error(
+                    f"Error while computing statistic {self.name} for metric {metric}: {e}",
                     extra={"experiment": experiment.normandy_slug},
                 )
-            else:
-                if reference_branch is None:
-                    ref_branch_list = branch_list
-                else:
-                    ref_branch_list = [reference_branch]
-
-                for ref_branch in ref_branch_list:
-                    try:
-                        statistic_result_collection.data += self.transform(
-                            df, metric, ref_branch, experiment
-                        ).data
-                    except Exception as e:
-                        logger.error(
-                            f"Error while computing statistic {self.name} for metric {metric}: {e}",
-                            extra={"experiment": experiment.normandy_slug},
-                        )
-
-                    df = df[df.branch != ref_branch]
 
         return statistic_result_collection
 
+    def branch_samples(self, df: DataFrame, metric: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a summary of each branch, for statistics that summarize every branch
+        independently, like resampled statistics or sufficient statistics.
+
+        The samples are computed once per metric and reused by `compare_samples` for the
+        comparisons to every reference branch. Returns None if branches are compared by
+        `transform` instead.
+        """
+        return None
+
+    def compare_samples(
+        self, branch_samples: Dict[str, Any], metric: str, reference_branch: str
+    ) -> "StatisticResultCollection":
+        """Summarizes the samples of each branch and compares them to the reference branch."""
+        raise NotImplementedError
+
+    def compressed_samples(self, column: CompressedColumn, metric: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a summary of each branch of a compressed column, like `branch_samples`
+        does for client-level data.
+        """
+        return None
+
+    def transform_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """Compares the branches of a compressed column, like `transform` does."""
+        raise NotImplementedError(f"{self.name()} doesn't support compressed columns")
+
+    def partitioned_samples(
+        self, frame: BranchPartitionedFrame, metric: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns a summary of each branch of partitioned data, like `branch_samples`
+        does for client-level data.
+        """
+        return None
+
+    def transform_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """
+        Compares the branches of partitioned data, like `transform` does.
+
+        Statistics that don't work on partitioned data directly transform a DataFrame.
+        """
+        return self.transform(frame.to_frame(metric), metric, reference_branch, experiment)
+
+    @classmethod
+    def supports_compressed(cls) -> bool:
+        """Returns whether the statistic can be computed from compressed columns."""
+        return cls.transform_compressed is not Statistic.transform_compressed
+
+    def apply_samples(
+        self,
+        branch_samples: Dict[str, Any],
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """
+        Compares precomputed branch samples the way `apply` compares branches.
+        """
+        reference_branch = experiment.reference_branch
+        if reference_branch and reference_branch not in branch_samples:
+            logger.warning(
+                f"Branch {reference_branch} not in {list(branch_samples)} for {self.name()}.",
+                extra={"experiment": experiment.normandy_slug},
+            )
+            return StatisticResultCollection([])
+
+        return self.compare_with_references(
+            branch_samples,
+            metric,
+            [reference_branch] if reference_branch else list(branch_samples),
+            experiment,
+        )
+
+    def compare_with_references(
+        self,
+        branch_samples: Dict[str, Any],
+        metric: str,
+        reference_branches: Iterable[str],
+        experiment: "config.ExperimentConfiguration",
+    ) -> "StatisticResultCollection":
+        """
+        Compares the branch samples to each of the reference branches in turn.
+
+        Like `apply`, a reference branch isn't compared to the reference branches before it.
+        """
+        results = StatisticResultCollection([])
+        branch_samples = dict(branch_samples)
+        for ref_branch in list(reference_branches):
+            try:
+                results.extend(self.compare_samples(branch_samples, metric, ref_branch))
+            except Exception as e:
+                logger.error(
+                    f"Error while computing statistic {self.name} for metric {metric}: {e}",
+                    extra={"experiment": experiment.normandy_slug},
+                )
+            del branch_samples[ref_branch]
+
+        return results
+
     @abstractmethod
     def transform(
         self,
@@ -224,12 +1022,14 @@ def flatten_simple_compare_branches_result(
     statistic_name: str,
     reference_branch: str,
     ci_width: float,
+    method: Optional[str] = None,
+    num_samples: Optional[int] = None,
 ) -> StatisticResultCollection:
     critical_point = (1 - ci_width) / 2
-    statlist = []
+    results = StatisticResultCollection([])
     for branch, branch_result in ma_result["individual"].items():
         lower, upper = _extract_ci(branch_result, critical_point)
-        statlist.append(
+        results.append(
             StatisticResult(
                 metric=metric_name,
                 statistic=statistic_name,
@@ -239,12 +1039,14 @@ def flatten_simple_compare_branches_result(
                 point=branch_result["mean"],
                 lower=lower,
                 upper=upper,
+                method=method,
+                num_samples=num_samples,
             )
         )
 
     for branch, branch_result in ma_result["comparative"].items():
         lower_abs, upper_abs = _extract_ci(branch_result["abs_uplift"], critical_point)
-        statlist.append(
+        results.append(
             StatisticResult(
                 metric=metric_name,
                 statistic=statistic_name,
@@ -256,11 +1058,13 @@ def flatten_simple_compare_branches_result(
                 point=branch_result["abs_uplift"]["exp"],
                 lower=lower_abs,
                 upper=upper_abs,
+                method=method,
+                num_samples=num_samples,
             )
         )
 
         lower_rel, upper_rel = _extract_ci(branch_result["rel_uplift"], critical_point)
-        statlist.append(
+        results.append(
             StatisticResult(
                 metric=metric_name,
                 statistic=statistic_name,
@@ -272,17 +1076,242 @@ def flatten_simple_compare_branches_result(
                 point=branch_result["rel_uplift"]["exp"],
                 lower=lower_rel,
                 upper=upper_rel,
+                method=method,
+                num_samples=num_samples,
             )
         )
 
-    return StatisticResultCollection(statlist)
+    return results
+
+
+BOOTSTRAP_CHUNK_BYTES = 2**26  # bounds the memory used for a chunk of bootstrap weights
+# replicates are drawn in blocks of this size, each from its own random stream
+BOOTSTRAP_BLOCK_SIZE = 1000
+# threads drawing blocks of replicates; dask worker processes already use all cores by default
+BOOTSTRAP_THREADS = int(os.getenv("JETSTREAM_BOOTSTRAP_THREADS", 0)) or 1
+# resample counts are drawn from a multinomial if there are this many values per distinct value
+MULTINOMIAL_CARDINALITY_RATIO = 16
+
+
+def _seed_sequence(seed: Optional[int], branch: Any) -> np.random.SeedSequence:
+    """
+    Returns the root of the random streams the replicates of a branch are drawn from.
+
+    Seeded streams only depend on the seed and the branch label, so they don't change
+    with the order or the set of branches. Unseeded streams use fresh entropy.
+    """
+    if seed is None:
+        return np.random.SeedSequence()
+    return np.random.SeedSequence([seed, zlib.crc32(str(branch).encode())])
+
+
+def _draw_replicates(
+    draws: Dict[Any, Callable[[int, np.random.Generator], np.ndarray]],
+    num_samples: int,
+    seed: Optional[int],
+    converged: Optional[Callable[[List[np.ndarray]], bool]] = None,
+) -> Dict[Any, np.ndarray]:
+    """
+    Draws up to `num_samples` replicates for each branch with `draws[branch](size, rng)`.
+
+    Replicates are drawn in blocks of BOOTSTRAP_BLOCK_SIZE, from random streams spawned
+    from the seed sequence of each branch, and concatenated in order. Blocks are drawn on
+    BOOTSTRAP_THREADS threads; the result is identical for any number of threads.
+
+    If `converged` is given, drawing stops at the first number of blocks for which
+    `converged(blocks)` holds for every branch. All branches get the same number of
+    replicates, since they are compared pairwise.
+    """
+    sizes = [
+        min(BOOTSTRAP_BLOCK_SIZE, num_samples - start)
+        for start in range(0, num_samples, BOOTSTRAP_BLOCK_SIZE)
+    ]
+    generators = {
+        branch: [
+            np.random.default_rng(child) for child in _seed_sequence(seed, branch).spawn(len(sizes))
+        ]
+        for branch in draws
+    }
+    blocks: Dict[Any, List[np.ndarray]] = {branch: [] for branch in draws}
+
+    # without a convergence check, all blocks are drawn at once
+    step = len(sizes) if converged is None else max(BOOTSTRAP_THREADS, 1)
+    executor = ThreadPoolExecutor(BOOTSTRAP_THREADS) if BOOTSTRAP_THREADS > 1 else None
+    try:
+        drawn = 0
+        while drawn < len(sizes):
+            indices = range(drawn, min(drawn + step, len(sizes)))
+            tasks = [(branch, i) for branch in draws for i in indices]
+
+            def draw_block(task: Tuple[Any, int]) -> np.ndarray:
+                branch, i = task
+                return draws[branch](sizes[i], generators[branch][i])
+
+            results = executor.map(draw_block, tasks) if executor else map(draw_block, tasks)
+            for (branch, _), block in zip(tasks, results):
+                blocks[branch].append(block)
+
+            # check every prefix, so the stopping point doesn't depend on the number of threads
+            for num_blocks in indices:
+                if converged is not None and all(
+                    converged(branch_blocks[: num_blocks + 1]) for branch_blocks in blocks.values()
+                ):
+                    return {
+                        branch: np.concatenate(branch_blocks[: num_blocks + 1])
+                        for branch, branch_blocks in blocks.items()
+                    }
+            drawn = indices.stop
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return {branch: np.concatenate(branch_blocks) for branch, branch_blocks in blocks.items()}
+
+
+def _endpoints_converged(
+    blocks: List[np.ndarray], confidence_interval: float, tolerance: float
+) -> bool:
+    """
+    Returns whether the Monte Carlo standard error of the confidence interval endpoints
+    of the replicates is at most `tolerance` times the width of the interval.
+
+    The standard error is estimated from the spread of the endpoints of the blocks
+    (batch means); at least two blocks are needed.
+    """
+    if len(blocks) < 2:
+        return False
+
+    critical_point = (1 - confidence_interval) / 2
+    quantiles = [critical_point, 1 - critical_point]
+    block_endpoints = np.stack([np.quantile(block, quantiles, axis=0) for block in blocks])
+    standard_error = block_endpoints.std(axis=0, ddof=1) / np.sqrt(len(blocks))
+    lower, upper = np.quantile(np.concatenate(blocks), quantiles, axis=0)
+    return bool((standard_error <= tolerance * (upper - lower)).all())
+
+
+def _convergence_check(
+    tolerance: Optional[float], confidence_interval: float
+) -> Optional[Callable[[List[np.ndarray]], bool]]:
+    if tolerance is None:
+        return None
+    return partial(
+        _endpoints_converged, confidence_interval=confidence_interval, tolerance=tolerance
+    )
+
+
+def _bootstrap_mean_samples(
+    values: np.ndarray,
+    num_samples: int,
+    rng: np.random.Generator,
+    counts: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Draws Bayesian bootstrap replicates of the means of several metrics of the same clients.
+
+    `values` has one row per client and one column per metric; NaN marks values that are
+    excluded from a metric's mean. The Dirichlet weights of a replicate are shared by all
+    metrics: restricted to the clients a metric includes and renormalized, they are again
+    Dirichlet distributed, so every metric's replicates are distributed as if they had
+    been drawn on their own. If `counts` is given, each row stands for that many clients.
+
+    Returns an array with one row per replicate and one column per metric.
+    """
+    num_metrics = values.shape[1]
+    included = ~np.isnan(values)
+    filled = np.where(included, values, 0.0)
+
+    # tally identical clients; the summed Dirichlet weights of c clients are Gamma(c) draws
+    if counts is None:
+        rows, counts = np.unique(np.hstack([filled, included]), axis=0, return_counts=True)
+    else:
+        rows, inverse = np.unique(np.hstack([filled, included]), axis=0, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=counts, minlength=len(rows))
+    filled, included = rows[:, :num_metrics], rows[:, num_metrics:]
+
+    samples = np.empty((num_samples, num_metrics))
+    chunk_size = max(1, BOOTSTRAP_CHUNK_BYTES // (8 * len(counts)))
+    for start in range(0, num_samples, chunk_size):
+        stop = min(start + chunk_size, num_samples)
+        weights = rng.standard_gamma(counts, size=(stop - start, len(counts)))
+        samples[start:stop] = (weights @ filled) / (weights @ included)
+
+    return samples
+
+
+def _drop_highest(
+    values: np.ndarray, fraction: float, counts: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Excludes values above the (1 - fraction) quantile of the included values.
+
+    If `counts` is given, `values` are the sorted distinct values of a histogram.
+    """
+    if not fraction:
+        return values
+    included = ~np.isnan(values)
+    if counts is None:
+        threshold = np.quantile(values[included], 1 - fraction)
+    else:
+        threshold = _quantiles_of_resamples(
+            values[included], counts[included][np.newaxis], np.array([1 - fraction])
+        )[0, 0]
+    return np.where(values > threshold, np.nan, values)
+
+
+def _mean_and_standard_error(
+    values: np.ndarray, counts: Optional[np.ndarray] = None
+) -> Tuple[float, float]:
+    """
+    Returns the mean of the included values and its standard error.
+
+    If `counts` is given, each value stands for that many clients.
+    """
+    included = ~np.isnan(values)
+    values = values[included]
+    if counts is None:
+        return values.mean(), values.std(ddof=1) / np.sqrt(len(values))
+
+    counts = counts[included]
+    n = counts.sum()
+    mean = np.dot(values, counts) / n
+    variance = np.dot(counts, (values - mean) ** 2) / (n - 1)
+    return mean, np.sqrt(variance / n)
 
 
 @attr.s(auto_attribs=True)
 class BootstrapMean(Statistic):
+    """
+    Means of a metric for each branch, with confidence intervals.
+
+    `method` selects how confidence intervals are computed:
+    * "bootstrap" (the default) draws `num_samples` Bayesian bootstrap replicates of each
+      branch's mean,
+    * "normal" uses the central limit theorem, and the delta method for relative uplifts,
+    * "auto" uses the normal approximation if every branch has at least
+      `normal_approximation_threshold` clients, and bootstraps otherwise. It has to be
+      configured explicitly, so the intervals of existing configurations don't change.
+
+    If `convergence_tolerance` is set, replicates are drawn in batches until the Monte Carlo
+    standard error of the interval endpoints is at most this fraction of the interval
+    width, up to `num_samples` replicates.
+    """
+
     num_samples: int = 10000
     drop_highest: float = 1e-4
     confidence_interval: float = 0.95
+    seed: Optional[int] = None
+    convergence_tolerance: Optional[float] = None
+    method: str = attr.ib(
+        default="bootstrap", validator=attr.validators.in_(["auto", "bootstrap", "normal"])
+    )
+    normal_approximation_threshold: int = 1_000_000
+
+    def uses_normal_approximation(self, branch_sizes: Iterable[int]) -> bool:
+        """Returns whether means of branches with these numbers of clients are approximated."""
+        if self.method == "auto":
+            # without clients there is nothing to approximate
+            return min(branch_sizes, default=0) >= self.normal_approximation_threshold
+        return self.method == "normal"
 
     def transform(
         self,
@@ -291,30 +1320,296 @@ class BootstrapMean(Statistic):
         reference_branch: str,
         experiment: "config.ExperimentConfiguration",
     ) -> StatisticResultCollection:
-        critical_point = (1 - self.confidence_interval) / 2
-        summary_quantiles = (critical_point, 1 - critical_point)
-
-        ma_result = mozanalysis.bayesian_stats.bayesian_bootstrap.compare_branches(
-            df,
-            col_label=metric,
-            ref_branch_label=reference_branch,
-            num_samples=self.num_samples,
-            individual_summary_quantiles=summary_quantiles,
-            threshold_quantile=1 - self.drop_highest,
+        return self.transform_partitioned(
+            BranchPartitionedFrame.from_frame(df, [metric]), metric, reference_branch, experiment
         )
 
-        return flatten_simple_compare_branches_result(
-            ma_result=ma_result,
-            metric_name=metric,
-            statistic_name="mean",
-            reference_branch=reference_branch,
-            ci_width=self.confidence_interval,
-        )
+    def branch_samples(self, df: DataFrame, metric: str) -> Optional[Dict[str, np.ndarray]]:
+        return self.compressed_samples(CompressedColumn.from_frame(df, metric), metric)
+
+    def partitioned_samples(
+        self, frame: BranchPartitionedFrame, metric: str
+    ) -> Optional[Dict[str, np.ndarray]]:
+        return self.compressed_samples(frame.compressed(metric), metric)
+
+    def transform_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        branch_samples = self.partitioned_samples(frame, metric)
+        if branch_samples is not None:
+            return self.compare_samples(branch_samples, metric, reference_branch)
+
+        logger.info(f"Computing means of {metric} with a normal approximation")
+        if np.isnan(frame.values(metric)).any():
+            raise ValueError(f"'{metric}' contains null values")
+        return self.normal_approximation(
+            {
+                branch: _mean_and_standard_error(
+                    _drop_highest(frame.values(metric, branch), self.drop_highest)
+                )
+                for branch in frame.branches
+            },
+            metric,
+            reference_branch,
+        )
+
+    def _included_histograms(self, column: CompressedColumn, metric: str) -> Dict[str, Histogram]:
+        result = {}
+        for branch in column.branches:
+            values, counts = column.histogram(branch)
+            if np.isnan(values).any():
+                raise ValueError(f"'{metric}' contains null values")
+            result[branch] = (_drop_highest(values, self.drop_highest, counts), counts)
+        return result
+
+    def compressed_samples(
+        self, column: CompressedColumn, metric: str
+    ) -> Optional[Dict[str, np.ndarray]]:
+        branch_histograms = self._included_histograms(column, metric)
+        if self.uses_normal_approximation(c.sum() for _, c in branch_histograms.values()):
+            return None
+
+        # tallies of equal values are drawn exactly like for client-level data
+        branch_samples = _draw_replicates(
+            {
+                branch: partial(_bootstrap_mean_samples, values[:, np.newaxis], counts=counts)
+                for branch, (values, counts) in branch_histograms.items()
+            },
+            self.num_samples,
+            self.seed,
+            _convergence_check(self.convergence_tolerance, self.confidence_interval),
+        )
+        num_samples = len(next(iter(branch_samples.values())))
+        logger.info(f"Computed means of {metric} with {num_samples} bootstrap samples")
+        return {branch: samples[:, 0] for branch, samples in branch_samples.items()}
+
+    def transform_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        branch_samples = self.compressed_samples(column, metric)
+        if branch_samples is not None:
+            return self.compare_samples(branch_samples, metric, reference_branch)
+
+        logger.info(f"Computing means of {metric} with a normal approximation")
+        return self.normal_approximation(
+            {
+                branch: _mean_and_standard_error(values, counts)
+                for branch, (values, counts) in self._included_histograms(column, metric).items()
+            },
+            metric,
+            reference_branch,
+        )
+
+    def normal_approximation(
+        self,
+        branch_moments: Dict[str, Tuple[float, float]],
+        metric: str,
+        reference_branch: str,
+    ) -> StatisticResultCollection:
+        """
+        Compares the means of each branch to the reference using normal approximations.
+
+        `branch_moments` holds the mean and its standard error for each branch.
+        """
+        if reference_branch not in branch_moments:
+            raise ValueError(f"Branch label '{reference_branch}' not in {list(branch_moments)}")
+
+        critical_point = (1 - self.confidence_interval) / 2
+        z = scipy.stats.norm.ppf(1 - critical_point)
+        lower_label, upper_label = str(critical_point), str(1 - critical_point)
+
+        def summary(point: float, standard_error: float, point_label: str) -> Series:
+            return Series(
+                {
+                    point_label: point,
+                    lower_label: point - z * standard_error,
+                    upper_label: point + z * standard_error,
+                }
+            )
+
+        means = {branch: mean for branch, (mean, _) in branch_moments.items()}
+        standard_errors = {branch: error for branch, (_, error) in branch_moments.items()}
+
+        reference_mean = means[reference_branch]
+        reference_error = standard_errors[reference_branch]
+        comparative = {}
+        for branch in branch_moments:
+            if branch == reference_branch:
+                continue
+
+            difference = means[branch] - reference_mean
+            difference_error = np.sqrt(standard_errors[branch] ** 2 + reference_error**2)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = means[branch] / reference_mean
+                ratio_error = np.abs(ratio) * np.sqrt(
+                    (standard_errors[branch] / means[branch]) ** 2
+                    + (reference_error / reference_mean) ** 2
+                )
+
+            comparative[branch] = {
+                "abs_uplift": summary(difference, difference_error, "exp"),
+                "rel_uplift": summary(ratio - 1, ratio_error, "exp"),
+            }
+
+        ma_result = {
+            "individual": {
+                branch: summary(means[branch], standard_errors[branch], "mean")
+                for branch in branch_moments
+            },
+            "comparative": comparative,
+        }
+
+        return flatten_simple_compare_branches_result(
+            ma_result=ma_result,
+            metric_name=metric,
+            statistic_name="mean",
+            reference_branch=reference_branch,
+            ci_width=self.confidence_interval,
+            method="normal",
+        )
+
+    def compare_samples(
+        self, branch_samples: Dict[str, np.ndarray], metric: str, reference_branch: str
+    ) -> StatisticResultCollection:
+        critical_point = (1 - self.confidence_interval) / 2
+        summary_quantiles = (critical_point, 1 - critical_point)
+
+        if reference_branch not in branch_samples:
+            raise ValueError(f"Branch label '{reference_branch}' not in {list(branch_samples)}")
+
+        ma_result = mozanalysis.bayesian_stats.compare_samples(
+            {branch: Series(samples) for branch, samples in branch_samples.items()},
+            reference_branch,
+            individual_summary_quantiles=summary_quantiles,
+        )
+
+        return flatten_simple_compare_branches_result(
+            ma_result=ma_result,
+            metric_name=metric,
+            statistic_name="mean",
+            reference_branch=reference_branch,
+            ci_width=self.confidence_interval,
+            method="bootstrap",
+            num_samples=len(next(iter(branch_samples.values()))),
+        )
+
+
+def run_bootstrap_means(
+    summaries: List[Summary],
+    data: Union[DataFrame, pa.Table, BranchPartitionedFrame],
+    experiment: "config.ExperimentConfiguration",
+) -> StatisticResultCollection:
+    """
+    Runs the BootstrapMean summaries of several metrics of the same clients jointly.
+
+    Bootstrap weights are drawn once per branch and replicate for all metrics with the
+    same sampling parameters, and all metric means of a chunk of replicates are
+    computed with a single matrix product.
+    Summaries with values that can't be bootstrapped jointly, like nulls, and summaries
+    of branches large enough for a normal approximation are run on their own.
+    """
+    metrics = [summary.metric.name for summary in summaries]
+    if isinstance(data, pa.Table):
+        data = BranchPartitionedFrame.from_arrow(data, metrics)
+    elif isinstance(data, DataFrame):
+        data = BranchPartitionedFrame.from_frame(data, [m for m in metrics if m in data])
+
+    results = StatisticResultCollection([])
+    branch_rows = [data.rows(branch) for branch in data.branches]
+    joint: Dict[Tuple, List[Tuple[Summary, np.ndarray]]] = {}
+
+    for summary in summaries:
+        assert isinstance(summary.statistic, BootstrapMean)
+        metric = summary.metric.name
+        if metric not in data.columns:
+            continue
+
+        treated_rows: Any = slice(None)
+        treated_column = data.columns[metric]
+        if summary.pre_treatments:
+            treated = data.to_frame(metric)
+            for pre_treatment in summary.pre_treatments:
+                treated = pre_treatment.apply(treated, metric)
+            treated_rows, treated_column = treated.index.to_numpy(), treated[metric]
+
+        try:
+            treated_values: Optional[np.ndarray] = np.asarray(treated_column, dtype=float)
+        except (TypeError, ValueError):
+            treated_values = None
+
+        column = np.full(data.num_rows, np.nan)
+        if treated_values is not None:
+            column[treated_rows] = treated_values
+
+        bootstrap_jointly = (
+            bool(branch_rows)
+            and treated_values is not None
+            and np.isfinite(treated_values).all()
+            and all((~np.isnan(column[rows])).any() for rows in branch_rows)
+        )
+        if not bootstrap_jointly:
+            results.extend(summary.run(data, experiment))
+            continue
+
+        branch_sizes = [(~np.isnan(column[rows])).sum() for rows in branch_rows]
+        if summary.statistic.uses_normal_approximation(branch_sizes):
+            results.extend(summary.run(data, experiment))
+            continue
+
+        for rows in branch_rows:
+            column[rows] = _drop_highest(column[rows], summary.statistic.drop_highest)
+
+        statistic = summary.statistic
+        key = (
+            statistic.num_samples,
+            statistic.seed,
+            statistic.convergence_tolerance,
+            statistic.confidence_interval,
+        )
+        joint.setdefault(key, []).append((summary, column))
+
+    for (num_samples, seed, tolerance, confidence_interval), group in joint.items():
+        values = np.column_stack([column for _, column in group])
+        branch_samples = _draw_replicates(
+            {
+                branch: partial(_bootstrap_mean_samples, values[rows])
+                for branch, rows in zip(data.branches, branch_rows)
+            },
+            num_samples,
+            seed,
+            _convergence_check(tolerance, confidence_interval),
+        )
+        logger.info(
+            f"Computed means of {len(group)} metrics with "
+            f"{len(next(iter(branch_samples.values())))} bootstrap samples"
+        )
+
+        for i, (summary, _) in enumerate(group):
+            results.extend(
+                summary.statistic.apply_samples(
+                    {branch: samples[:, i] for branch, samples in branch_samples.items()},
+                    summary.metric.name,
+                    experiment,
+                )
+            )
+
+    return results
 
 
 @attr.s(auto_attribs=True)
 class Binomial(Statistic):
     confidence_interval: float = 0.95
+    num_samples: int = 10000
+    seed: Optional[int] = None
 
     def transform(
         self,
@@ -322,18 +1617,97 @@ class Binomial(Statistic):
         metric: str,
         reference_branch: str,
         experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        return self.compare_samples(self.branch_samples(df, metric), metric, reference_branch)
+
+    def branch_samples(self, df: DataFrame, metric: str) -> Dict[str, Series]:
+        """Returns the number of enrollments and conversions of each branch."""
+        aggregates = mozanalysis.bayesian_stats.binary.aggregate_col(df, metric)
+        return {branch: row for branch, row in aggregates.iterrows()}
+
+    def partitioned_samples(self, frame: BranchPartitionedFrame, metric: str) -> Dict[str, Series]:
+        column = frame.compressed(metric)
+        if not np.isin(column.values, (0, 1)).all():
+            raise ValueError(f"All values in column '{metric}' must be 0 or 1.")
+
+        # sorted by branch, like the aggregates of client-level data
+        successes = column.values == 1
+        return {
+            branch: Series(
+                {"num_enrollments": weights.sum(), "num_conversions": weights[successes].sum()},
+                dtype="int64",
+            )
+            for branch, weights in sorted(column.weights.items())
+        }
+
+    def apply_aggregates(
+        self,
+        aggregates: DataFrame,
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        """
+        Compares branches by aggregates that have been computed in BigQuery.
+
+        `aggregates` has a row per branch with the number of clients `n`, the number of
+        clients with value 1 `successes` and the number of clients with `invalid` values
+        that are null or neither 0 nor 1.
+        """
+        if (aggregates["invalid"] > 0).any():
+            logger.error(
+                f"Error while computing statistic {self.name()} for metric {metric}: "
+                f"All values in column '{metric}' must be 0 or 1.",
+                extra={"experiment": experiment.normandy_slug},
+            )
+            return StatisticResultCollection([])
+
+        branch_samples = {
+            row.branch: Series(
+                {"num_enrollments": row.n, "num_conversions": row.successes}, dtype="int64"
+            )
+            for row in aggregates.itertuples()
+        }
+        return self.apply_samples(branch_samples, metric, experiment)
+
+    def compare_samples(
+        self, branch_samples: Dict[str, Series], metric: str, reference_branch: str
     ) -> StatisticResultCollection:
         critical_point = (1 - self.confidence_interval) / 2
         summary_quantiles = (critical_point, 1 - critical_point)
 
-        ma_result = mozanalysis.bayesian_stats.binary.compare_branches(
-            df,
-            col_label=metric,
-            ref_branch_label=reference_branch,
-            individual_summary_quantiles=summary_quantiles,
-            comparative_summary_quantiles=summary_quantiles,
+        if reference_branch not in branch_samples:
+            raise ValueError(f"Branch label '{reference_branch}' not in {list(branch_samples)}")
+
+        # sample conversion rates from the Beta posteriors of a uniform prior
+        samples = _draw_replicates(
+            {
+                branch: partial(
+                    _beta_samples,
+                    row["num_conversions"] + 1,
+                    row["num_enrollments"] - row["num_conversions"] + 1,
+                )
+                for branch, row in branch_samples.items()
+            },
+            self.num_samples,
+            self.seed,
         )
 
+        ma_result = {
+            "individual": {
+                branch: mozanalysis.bayesian_stats.binary.summarize_one_branch_from_agg(
+                    row, quantiles=summary_quantiles
+                )
+                for branch, row in branch_samples.items()
+            },
+            "comparative": {
+                branch: mozanalysis.bayesian_stats.summarize_joint_samples(
+                    replicates, samples[reference_branch], quantiles=summary_quantiles
+                )
+                for branch, replicates in samples.items()
+                if branch != reference_branch
+            },
+        }
+
         return flatten_simple_compare_branches_result(
             ma_result=ma_result,
             metric_name=metric,
@@ -343,20 +1717,130 @@ class Binomial(Statistic):
         )
 
 
+def _beta_samples(a: float, b: float, size: int, rng: np.random.Generator) -> np.ndarray:
+    return rng.beta(a, b, size=size)
+
+
+def _quantiles_of_resamples(
+    distinct: np.ndarray, resample_counts: np.ndarray, quantiles: np.ndarray
+) -> np.ndarray:
+    """
+    Computes quantiles of resamples that are given as counts of sorted distinct values.
+
+    The order statistics that `np.quantile` interpolates between are looked up in the
+    cumulative counts, so resamples never have to be materialized or sorted. Each result
+    equals `np.quantile` of the corresponding resample.
+
+    Returns an array with one row per resample and one column per quantile.
+    """
+    num_resamples, num_distinct = resample_counts.shape
+    n = resample_counts[0].sum()
+
+    # positions of the order statistics np.quantile interpolates between (method="linear")
+    positions = (n - 1) * np.asarray(quantiles)
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, n - 1)
+    fraction = positions - below
+
+    # offset the cumulative counts of each resample, so all lookups are a single search
+    offsets = (n + 1) * np.arange(num_resamples)[:, np.newaxis]
+    cumulative = (np.cumsum(resample_counts, axis=1) + offsets).ravel()
+    row_starts = num_distinct * np.arange(num_resamples)[:, np.newaxis]
+
+    def order_statistic(k: np.ndarray) -> np.ndarray:
+        return distinct[np.searchsorted(cumulative, k + offsets, side="right") - row_starts]
+
+    lower, upper = order_statistic(below), order_statistic(above)
+
+    # interpolate like numpy does, to match np.quantile exactly
+    difference = upper - lower
+    return np.where(
+        fraction >= 0.5, upper - difference * (1 - fraction), lower + difference * fraction
+    )
+
+
+def _bootstrap_quantiles(
+    values: np.ndarray, quantiles: np.ndarray, num_samples: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Computes quantiles of bootstrap resamples of values.
+
+    The values are sorted and tallied once; resamples are drawn as counts of the distinct
+    values. For few distinct values, the counts are drawn from a multinomial distribution,
+    otherwise by tallying resampled indices, which is cheaper than per-value binomial draws.
+
+    Returns an array with one row per resample and one column per quantile.
+    """
+    distinct, counts = np.unique(values, return_counts=True)
+    return _bootstrap_histogram_quantiles(distinct, counts, quantiles, num_samples, rng)
+
+
+def _bootstrap_histogram_quantiles(
+    distinct: np.ndarray,
+    counts: np.ndarray,
+    quantiles: np.ndarray,
+    num_samples: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Computes quantiles of bootstrap resamples of the clients in a histogram.
+
+    Returns an array with one row per resample and one column per quantile.
+    """
+    n = counts.sum()
+    # codes of the sorted values, so resamples don't depend on the order of the values
+    sorted_codes = np.repeat(np.arange(len(distinct)), counts)
+    use_multinomial = len(distinct) * MULTINOMIAL_CARDINALITY_RATIO < n
+
+    result = np.empty((num_samples, len(quantiles)))
+    row_size = len(distinct) if use_multinomial else n
+    chunk_size = max(1, BOOTSTRAP_CHUNK_BYTES // (8 * row_size))
+    for start in range(0, num_samples, chunk_size):
+        stop = min(start + chunk_size, num_samples)
+        size = stop - start
+        if use_multinomial:
+            resample_counts = rng.multinomial(n, counts / n, size=size)
+        else:
+            codes = sorted_codes[rng.integers(0, n, size=(size, n))]
+            codes += len(distinct) * np.arange(size)[:, np.newaxis]
+            resample_counts = np.bincount(codes.ravel(), minlength=size * len(distinct)).reshape(
+                size, len(distinct)
+            )
+
+        result[start:stop] = _quantiles_of_resamples(distinct, resample_counts, quantiles)
+
+    return result
+
+
 @attr.s(auto_attribs=True)
 class Deciles(Statistic):
+    """
+    Deciles of a metric for each branch, with confidence intervals.
+
+    `method` selects how confidence intervals are computed:
+    * "bootstrap" (the default) resamples each branch `num_samples` times,
+    * "order_statistics" uses distribution-free intervals from binomial order statistics,
+      and a normal approximation for the comparisons between branches, without resampling,
+    * "auto" uses order statistics if every branch has at least
+      `order_statistics_threshold` clients, and bootstraps otherwise. It has to be
+      configured explicitly, so the intervals of existing configurations don't change.
+
+    If `convergence_tolerance` is set, bootstrap replicates are drawn in batches until the
+    Monte Carlo standard error of the interval endpoints is at most this fraction of the
+    interval width, up to `num_samples` replicates.
+    """
+
     confidence_interval: float = 0.95
     num_samples: int = 10000
+    method: str = attr.ib(
+        default="bootstrap",
+        validator=attr.validators.in_(["auto", "bootstrap", "order_statistics"]),
+    )
+    seed: Optional[int] = None
+    convergence_tolerance: Optional[float] = None
+    order_statistics_threshold: int = 1_000_000
 
-    @staticmethod
-    def _decilize(arr):
-        deciles = np.arange(1, 10) * 0.1
-        arr_quantiles = np.quantile(arr, deciles)
-
-        arr_dict = {
-            f"{label:.1}": arr_quantile for label, arr_quantile in zip(deciles, arr_quantiles)
-        }
-        return arr_dict
+    DECILES = np.arange(1, 10) * 0.1
 
     def transform(
         self,
@@ -364,18 +1848,98 @@ class Deciles(Statistic):
         metric: str,
         reference_branch: str,
         experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        branch_list = df.branch.unique()
+        if reference_branch not in branch_list:
+            raise ValueError(f"Branch label '{reference_branch}' not in {branch_list}")
+
+        return self.transform_compressed(
+            CompressedColumn.from_frame(df, metric), metric, reference_branch, experiment
+        )
+
+    def uses_order_statistics(self, branch_sizes: Iterable[int]) -> bool:
+        """Returns whether deciles of branches with these numbers of clients are approximated."""
+        if self.method == "auto":
+            # without clients there is nothing to approximate
+            return min(branch_sizes, default=0) >= self.order_statistics_threshold
+        return self.method == "order_statistics"
+
+    def branch_samples(self, df: DataFrame, metric: str) -> Optional[Dict[str, DataFrame]]:
+        return self.compressed_samples(CompressedColumn.from_frame(df, metric), metric)
+
+    def partitioned_samples(
+        self, frame: BranchPartitionedFrame, metric: str
+    ) -> Optional[Dict[str, DataFrame]]:
+        return self.compressed_samples(frame.compressed(metric), metric)
+
+    def transform_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        return self.transform_compressed(
+            frame.compressed(metric), metric, reference_branch, experiment
+        )
+
+    def _branch_histograms(self, column: CompressedColumn, metric: str) -> Dict[str, Histogram]:
+        if np.isnan(column.values).any():
+            raise ValueError(f"'{metric}' contains null values")
+        return {branch: column.histogram(branch) for branch in column.branches}
+
+    def compressed_samples(
+        self, column: CompressedColumn, metric: str
+    ) -> Optional[Dict[str, DataFrame]]:
+        branch_histograms = self._branch_histograms(column, metric)
+        if self.uses_order_statistics(c.sum() for _, c in branch_histograms.values()):
+            return None
+
+        branch_samples = _draw_replicates(
+            {
+                branch: partial(_bootstrap_histogram_quantiles, values, counts, self.DECILES)
+                for branch, (values, counts) in branch_histograms.items()
+            },
+            self.num_samples,
+            self.seed,
+            _convergence_check(self.convergence_tolerance, self.confidence_interval),
+        )
+        labels = [f"{label:.1}" for label in self.DECILES]
+        return {
+            branch: DataFrame(samples, columns=labels) for branch, samples in branch_samples.items()
+        }
+
+    def transform_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        if reference_branch not in column.branches:
+            raise ValueError(f"Branch label '{reference_branch}' not in {column.branches}")
+
+        branch_samples = self.compressed_samples(column, metric)
+        if branch_samples is not None:
+            return self.compare_samples(branch_samples, metric, reference_branch)
+        return self._order_statistics(
+            self._branch_histograms(column, metric), metric, reference_branch
+        )
+
+    def compare_samples(
+        self, branch_samples: Dict[str, DataFrame], metric: str, reference_branch: str
     ) -> StatisticResultCollection:
         stats_results = StatisticResultCollection([])
 
         critical_point = (1 - self.confidence_interval) / 2
         summary_quantiles = (critical_point, 1 - critical_point)
 
-        ma_result = mozanalysis.frequentist_stats.bootstrap.compare_branches(
-            df,
-            stat_fn=self._decilize,
-            col_label=metric,
-            ref_branch_label=reference_branch,
-            num_samples=self.num_samples,
+        if reference_branch not in branch_samples:
+            raise ValueError(f"Branch label '{reference_branch}' not in {list(branch_samples)}")
+
+        ma_result = mozanalysis.bayesian_stats.compare_samples(
+            branch_samples,
+            reference_branch,
             individual_summary_quantiles=summary_quantiles,
             comparative_summary_quantiles=summary_quantiles,
         )
@@ -383,7 +1947,7 @@ class Deciles(Statistic):
         for branch, branch_result in ma_result["individual"].items():
             for param, decile_result in branch_result.iterrows():
                 lower, upper = _extract_ci(decile_result, critical_point)
-                stats_results.data.append(
+                stats_results.append(
                     StatisticResult(
                         metric=metric,
                         statistic="deciles",
@@ -400,7 +1964,7 @@ class Deciles(Statistic):
             abs_uplift = branch_result["abs_uplift"]
             for param, decile_result in abs_uplift.iterrows():
                 lower_abs, upper_abs = _extract_ci(decile_result, critical_point)
-                stats_results.data.append(
+                stats_results.append(
                     StatisticResult(
                         metric=metric,
                         statistic="deciles",
@@ -418,7 +1982,7 @@ class Deciles(Statistic):
             rel_uplift = branch_result["rel_uplift"]
             for param, decile_result in rel_uplift.iterrows():
                 lower_rel, upper_rel = _extract_ci(decile_result, critical_point)
-                stats_results.data.append(
+                stats_results.append(
                     StatisticResult(
                         metric=metric,
                         statistic="deciles",
@@ -435,6 +1999,87 @@ class Deciles(Statistic):
 
         return stats_results
 
+    def _order_statistics(
+        self, branch_histograms: Dict[str, Histogram], metric: str, reference_branch: str
+    ) -> StatisticResultCollection:
+        stats_results = StatisticResultCollection([])
+        alpha = 1 - self.confidence_interval
+        z = scipy.stats.norm.ppf(1 - alpha / 2)
+
+        points, standard_errors = {}, {}
+        for branch, (values, counts) in branch_histograms.items():
+            cumulative = np.cumsum(counts)
+            n = cumulative[-1]
+
+            # the interval between these order statistics covers the population decile
+            # with at least the configured confidence
+            lower_index = np.maximum(scipy.stats.binom.ppf(alpha / 2, n, self.DECILES) - 1, 0)
+            upper_index = np.minimum(scipy.stats.binom.ppf(1 - alpha / 2, n, self.DECILES), n - 1)
+            lower = values[np.searchsorted(cumulative, lower_index, side="right")]
+            upper = values[np.searchsorted(cumulative, upper_index, side="right")]
+
+            points[branch] = _quantiles_of_resamples(values, counts[np.newaxis], self.DECILES)[0]
+            standard_errors[branch] = (upper - lower) / (2 * z)
+
+            for decile, point, lower_bound, upper_bound in zip(
+                self.DECILES, points[branch], lower, upper
+            ):
+                stats_results.append(
+                    StatisticResult(
+                        metric=metric,
+                        statistic="deciles",
+                        parameter=f"{decile:.1}",
+                        branch=branch,
+                        ci_width=self.confidence_interval,
+                        point=point,
+                        lower=lower_bound,
+                        upper=upper_bound,
+                    )
+                )
+
+        reference_points = points[reference_branch]
+        reference_errors = standard_errors[reference_branch]
+        for branch in points:
+            if branch == reference_branch:
+                continue
+
+            difference = points[branch] - reference_points
+            difference_error = np.sqrt(standard_errors[branch] ** 2 + reference_errors**2)
+
+            # delta method for the ratio of the deciles
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = points[branch] / reference_points
+                ratio_error = np.abs(ratio) * np.sqrt(
+                    (standard_errors[branch] / points[branch]) ** 2
+                    + (reference_errors / reference_points) ** 2
+                )
+
+            for i, decile in enumerate(self.DECILES):
+                relative_uplift = ratio[i] - 1
+                comparisons = [
+                    ("difference", difference[i], difference_error[i]),
+                    ("relative_uplift", relative_uplift, ratio_error[i]),
+                ]
+                for comparison, point, error in comparisons:
+                    if not np.isfinite(point) or not np.isfinite(error):
+                        point = error = None
+                    stats_results.append(
+                        StatisticResult(
+                            metric=metric,
+                            statistic="deciles",
+                            parameter=f"{decile:.1}",
+                            branch=branch,
+                            comparison=comparison,
+                            comparison_to_branch=reference_branch,
+                            ci_width=self.confidence_interval,
+                            point=point,
+                            lower=point - z * error if point is not None else None,
+                            upper=point + z * error if point is not None else None,
+                        )
+                    )
+
+        return stats_results
+
 
 class Count(Statistic):
     def apply(
@@ -454,24 +2099,61 @@ class Count(Statistic):
         reference_branch: str,
         experiment: "config.ExperimentConfiguration",
     ) -> StatisticResultCollection:
-        results = []
         counts = df.groupby("branch").size()
-        for branch, n in counts.items():
-            results.append(
-                StatisticResult(
-                    metric="identity",
-                    statistic="count",
-                    parameter=None,
-                    branch=branch,
-                    comparison=None,
-                    comparison_to_branch=None,
-                    ci_width=None,
-                    point=n,
-                    lower=None,
-                    upper=None,
-                )
-            )
-        return StatisticResultCollection(results)
+        return StatisticResultCollection.from_columns(
+            metric="identity",
+            statistic="count",
+            branch=counts.index.to_numpy(),
+            point=counts.to_numpy(),
+        )
+
+    def apply_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        return self.transform_partitioned(
+            frame, metric, experiment.reference_branch or "control", experiment
+        )
+
+    def transform_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        return self._counts(frame.sizes())
+
+    def apply_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        return self.transform_compressed(
+            column, metric, experiment.reference_branch or "control", experiment
+        )
+
+    def transform_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        return self._counts(column.sizes())
+
+    @staticmethod
+    def _counts(sizes: Dict[str, int]) -> StatisticResultCollection:
+        branches = sorted(sizes)
+        return StatisticResultCollection.from_columns(
+            metric="identity",
+            statistic="count",
+            branch=branches,
+            point=[sizes[branch] for branch in branches],
+        )
 
 
 @attr.s(auto_attribs=True)
@@ -501,6 +2183,66 @@ def _make_grid(values: Series, size: int, attempt_geometric: bool) -> MakeGridRe
     )
 
 
+KDE_BINS_PER_BANDWIDTH = 16  # resolution of the binned density estimate
+KDE_MAX_BINS = 2**22  # bounds the memory of the binned density estimate
+KDE_GAUSSIAN_CUT = 6  # bandwidths after which the gaussian kernel is truncated
+
+
+def _binned_kde(
+    values: np.ndarray,
+    points: np.ndarray,
+    bandwidth: float,
+    kernel: str,
+    weights: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Evaluates the kernel density estimate of values at points.
+
+    The values are linearly binned onto a uniform grid that resolves the bandwidth,
+    the bin counts are convolved with the kernel using FFTs, and the density is
+    interpolated at the points. This takes O(n + bins * log(bins)) time for any kernel,
+    instead of O(n * points) for evaluating the kernel at every value.
+
+    If `weights` is given, each value stands for that many clients.
+    """
+    if weights is None:
+        weights = np.ones(len(values))
+    kern = kde_kernels[kernel]()
+    low, high = kern.domain if kern.domain is not None else (-KDE_GAUSSIAN_CUT, KDE_GAUSSIAN_CUT)
+    start = min(values.min(), points.min()) + low * bandwidth
+    stop = max(values.max(), points.max()) + high * bandwidth
+    num_bins = int(np.ceil((stop - start) / bandwidth * KDE_BINS_PER_BANDWIDTH))
+    if num_bins > KDE_MAX_BINS:
+        logger.warning(
+            f"Values span {num_bins} bins of the kernel density estimate; "
+            f"using {KDE_MAX_BINS} bins, which don't resolve the bandwidth {bandwidth}"
+        )
+        num_bins = KDE_MAX_BINS
+    bin_width = (stop - start) / num_bins
+
+    # linear binning: each value is split between its two nearest bin centers
+    position = (values - start) / bin_width
+    index = np.minimum(np.floor(position).astype(np.int64), num_bins - 1)
+    upper_weight = position - index
+    counts = np.bincount(index, (1 - upper_weight) * weights, minlength=num_bins + 1)
+    counts += np.bincount(index + 1, upper_weight * weights, minlength=num_bins + 1)
+
+    taps = np.arange(
+        np.floor(low * bandwidth / bin_width), np.ceil(high * bandwidth / bin_width) + 1
+    )
+    u, step = taps * bin_width / bandwidth, bin_width / bandwidth
+    # weight taps at the edges of the kernel's domain by the part of their bin inside it
+    inside = np.clip((high - u) / step + 0.5, 0, 1) * np.clip((u - low) / step + 0.5, 0, 1)
+    taps_weights = kern(np.clip(u, low, high)) * inside
+    density = scipy.signal.fftconvolve(counts, taps_weights, mode="full")
+    # align the convolution with the bin centers and normalize
+    first, last = int(-taps[0]), int(-taps[0]) + num_bins + 1
+    density = density[first:last] / (weights.sum() * bandwidth)
+
+    centers = start + bin_width * np.arange(num_bins + 1)
+    return np.interp(points, centers, np.maximum(density, 0))
+
+
 @attr.s(auto_attribs=True)
 class KernelDensityEstimate(Statistic):
     bandwidth: str = "normal_reference"
@@ -516,54 +2258,127 @@ class KernelDensityEstimate(Statistic):
         reference_branch: str,
         experiment: "config.ExperimentConfiguration",
     ) -> StatisticResultCollection:
-        results = []
-        for branch, group in df.groupby("branch"):
-            kde = sm.nonparametric.KDEUnivariate(group[metric])
-            kde.fit(bw=self.bandwidth, adjust=self.adjust, kernel=self.kernel)
-            grid = _make_grid(group[metric], self.grid_size, self.log_space)
+        return self.transform_partitioned(
+            BranchPartitionedFrame.from_frame(df, [metric]), metric, reference_branch, experiment
+        )
+
+    def transform_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        results = StatisticResultCollection([])
+        for branch in sorted(frame.branches):
+            values = frame.values(metric, branch)
+            sorted_values = frame.sorted_values(metric, branch)
+            grid = _make_grid(Series(sorted_values), self.grid_size, self.log_space)
             if grid.message:
                 logger.warning(
                     f"KernelDensityEstimate for metric {metric}, branch {branch}: {grid.message}",
                     extra={"experiment": experiment.normandy_slug},
                 )
-            result = kde.evaluate(grid.grid)
-            if group[metric].min() == 0 and grid.geometric:
-                results.append(
-                    StatisticResult(
-                        metric=metric,
-                        statistic="kernel_density_estimate",
-                        parameter=0,
-                        branch=branch,
-                        comparison=None,
-                        comparison_to_branch=None,
-                        ci_width=None,
-                        point=kde.evaluate(0)[0],
-                        lower=None,
-                        upper=None,
-                    )
+
+            points = grid.grid
+            if sorted_values[0] == 0 and grid.geometric:
+                points = np.append(0, points)
+
+            results.extend(
+                StatisticResultCollection.from_columns(
+                    metric=metric,
+                    statistic="kernel_density_estimate",
+                    branch=branch,
+                    parameter=points,
+                    point=_binned_kde(values, points, self._bandwidth(values), self.kernel),
                 )
-            for x, y in zip(grid.grid, result):
-                results.append(
-                    StatisticResult(
-                        metric=metric,
-                        statistic="kernel_density_estimate",
-                        parameter=x,
-                        branch=branch,
-                        comparison=None,
-                        comparison_to_branch=None,
-                        ci_width=None,
-                        point=y,
-                        lower=None,
-                        upper=None,
-                    )
+            )
+        return results
+
+    def transform_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        results = StatisticResultCollection([])
+        for branch in sorted(column.branches):
+            values, counts = column.histogram(branch)
+            grid = _make_grid(Series(values), self.grid_size, self.log_space)
+            if grid.message:
+                logger.warning(
+                    f"KernelDensityEstimate for metric {metric}, branch {branch}: {grid.message}",
+                    extra={"experiment": experiment.normandy_slug},
                 )
-        return StatisticResultCollection(results)
+
+            points = grid.grid
+            if values[0] == 0 and grid.geometric:
+                points = np.append(0, points)
+
+            bandwidth = self._bandwidth(values, counts)
+            results.extend(
+                StatisticResultCollection.from_columns(
+                    metric=metric,
+                    statistic="kernel_density_estimate",
+                    branch=branch,
+                    parameter=points,
+                    point=_binned_kde(values, points, bandwidth, self.kernel, counts),
+                )
+            )
+        return results
+
+    def _bandwidth(self, values: np.ndarray, counts: Optional[np.ndarray] = None) -> float:
+        if not isinstance(self.bandwidth, str):
+            return float(self.bandwidth) * self.adjust
+        kern = kde_kernels[self.kernel]()
+        if counts is None:
+            return bandwidths.select_bandwidth(values, self.bandwidth, kern) * self.adjust
+        return _weighted_bandwidth(values, counts, self.bandwidth, kern) * self.adjust
+
+
+def _weighted_bandwidth(values: np.ndarray, counts: np.ndarray, rule: str, kernel) -> float:
+    """
+    Selects the bandwidth like statsmodels' `select_bandwidth` does, for sorted distinct
+    values that occur `counts` times.
+
+    All of statsmodels' rules are a constant times A * n ** -0.2, where A is the smaller
+    of the standard deviation and the normalized interquartile range.
+    """
+    constants = {
+        "scott": 1.059,
+        "silverman": 0.9,
+        "normal_reference": kernel.normal_reference_constant,
+    }
+    rule = rule.lower()
+    if rule not in constants:
+        raise ValueError(f"Bandwidth {rule} not understood")
+
+    n = counts.sum()
+    _, standard_error = _mean_and_standard_error(values, counts)
+    std = standard_error * np.sqrt(n)
+    lower, upper = _quantiles_of_resamples(values, counts[np.newaxis], np.array([0.25, 0.75]))[0]
+    iqr = (upper - lower) / 1.349
+    sigma = min(std, iqr) if iqr > 0 else std
+
+    bandwidth = constants[rule] * sigma * n ** (-0.2)
+    if bandwidth == 0:
+        raise RuntimeError("Selected KDE bandwidth is 0. Cannot estimate density.")
+    return bandwidth
 
 
 @attr.s(auto_attribs=True)
 class EmpiricalCDF(Statistic):
+    """
+    Empirical cumulative distribution function of a metric for each branch.
+
+    If `shared_grid` is set, all branches are evaluated on the same grid, spanning the
+    values of all branches, so their curves can be compared point by point.
+    """
+
     log_space: bool = False
     grid_size: int = 256
+    shared_grid: bool = False
 
     def transform(
         self,
@@ -572,44 +2387,68 @@ class EmpiricalCDF(Statistic):
         reference_branch: str,
         experiment: "config.ExperimentConfiguration",
     ) -> StatisticResultCollection:
-        results = []
-        for branch, group in df.groupby("branch"):
-            f = ECDF(group[metric])
-            grid = _make_grid(group[metric], self.grid_size, self.log_space)
-            if grid.message:
-                logger.warning(
-                    f"EmpiricalCDF for metric {metric}, branch {branch}: {grid.message}",
-                    extra={"experiment": experiment.normandy_slug},
-                )
-            if group[metric].min() == 0 and grid.geometric:
-                results.append(
-                    StatisticResult(
-                        metric=metric,
-                        statistic="empirical_cdf",
-                        parameter=0,
-                        branch=branch,
-                        comparison=None,
-                        comparison_to_branch=None,
-                        ci_width=None,
-                        point=f(0),
-                        lower=None,
-                        upper=None,
-                    )
+        return self.transform_compressed(
+            CompressedColumn.from_frame(df, metric), metric, reference_branch, experiment
+        )
+
+    def transform_partitioned(
+        self,
+        frame: BranchPartitionedFrame,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        return self.transform_compressed(
+            frame.compressed(metric), metric, reference_branch, experiment
+        )
+
+    def _points(
+        self, values: np.ndarray, context: str, experiment: "config.ExperimentConfiguration"
+    ) -> np.ndarray:
+        """Points at which to evaluate the CDF of the sorted distinct `values`."""
+        grid = _make_grid(Series(values), self.grid_size, self.log_space)
+        if grid.message:
+            logger.warning(
+                f"{context}: {grid.message}", extra={"experiment": experiment.normandy_slug}
+            )
+        points = grid.grid
+        if values[0] == 0 and grid.geometric:
+            points = np.append(0, points)
+        return points
+
+    def transform_compressed(
+        self,
+        column: CompressedColumn,
+        metric: str,
+        reference_branch: str,
+        experiment: "config.ExperimentConfiguration",
+    ) -> StatisticResultCollection:
+        shared_points = None
+        if self.shared_grid:
+            shared_points = self._points(
+                column.values, f"EmpiricalCDF for metric {metric}", experiment
+            )
+
+        results = StatisticResultCollection([])
+        for branch in sorted(column.branches):
+            values, counts = column.histogram(branch)
+            points = shared_points
+            if points is None:
+                points = self._points(
+                    values, f"EmpiricalCDF for metric {metric}, branch {branch}", experiment
                 )
-            cdf = f(grid.grid)
-            for x, y in zip(grid.grid, cdf):
-                results.append(
-                    StatisticResult(
-                        metric=metric,
-                        statistic="empirical_cdf",
-                        parameter=x,
-                        branch=branch,
-                        comparison=None,
-                        comparison_to_branch=None,
-                        ci_width=None,
-                        point=y,
-                        lower=None,
-                        upper=None,
-                    )
+
+            # the number of clients with values up to each point
+            cumulative = np.concatenate([[0], np.cumsum(counts)])
+            cdf = cumulative[np.searchsorted(values, points, side="right")] / cumulative[-1]
+            results.extend(
+                StatisticResultCollection.from_columns(
+                    metric=metric,
+                    statistic="empirical_cdf",
+                    branch=branch,
+                    parameter=points,
+                    point=cdf,
                 )
-        return StatisticResultCollection(results)
+            )
+
+        return results
@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+import attr
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 10 * 1024**3  # bytes
+
+
+@attr.s(auto_attribs=True)
+class TableCache:
+    """
+    Local on-disk cache of downloaded BigQuery tables, stored as Parquet files.
+
+    Entries are addressed by the table ID, the table version and the selected columns,
+    so a table that has been re-written is never served from the cache. The least
+    recently used entries are evicted once the cache grows beyond `max_size` bytes.
+    """
+
+    path: Path
+    max_size: int = DEFAULT_CACHE_SIZE
+
+    @classmethod
+    def from_env(cls) -> Optional["TableCache"]:
+        """
+        Returns the cache configured by JETSTREAM_CACHE_DIR and JETSTREAM_CACHE_SIZE (bytes).
+
+        Caching is disabled if no cache directory is configured.
+        """
+        path = os.getenv("JETSTREAM_CACHE_DIR")
+        if not path:
+            return None
+        max_size = int(os.getenv("JETSTREAM_CACHE_SIZE", 0)) or DEFAULT_CACHE_SIZE
+        return cls(Path(path), max_size)
+
+    @staticmethod
+    def key(table_id: str, version: str, columns: Optional[Iterable[str]] = None) -> str:
+        """Returns the cache key of a version of a table, restricted to columns."""
+        selected = ",".join(sorted(columns)) if columns is not None else "*"
+        return hashlib.sha256(f"{table_id}\n{version}\n{selected}".encode()).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[pa.Table]:
+        """Returns the cached table or None if it isn't cached."""
+        file = self._file(key)
+        try:
+            table = pq.read_table(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowInvalid) as e:
+            # entries that are truncated or can't be read count as misses
+            logger.warning("Ignoring unreadable table cache entry %s: %s", file.name, e)
+            return None
+
+        # mark the entry as recently used, unless it has been evicted in the meantime
+        try:
+            os.utime(file)
+        except OSError:
+            pass
+        return table
+
+    def put(self, key: str, table: pa.Table) -> None:
+        """Adds the table to the cache and evicts old entries if the cache is full."""
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file first, so concurrent readers never see partial files
+        tmp_file = self.path / f".{key}.{uuid.uuid4().hex}.tmp"
+        pq.write_table(table, tmp_file)
+        os.replace(tmp_file, self._file(key))
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Deletes the least recently used entries until the cache fits into max_size."""
+        entries = []
+        for file in self.path.glob("*.parquet"):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, file in sorted(entries):
+            if size <= self.max_size:
+                break
+            logger.info("Evicting %s from table cache", file.name)
+            try:
+                file.unlink()
+            except FileNotFoundError:
+                pass
+            size -= entry_size
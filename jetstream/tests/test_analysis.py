@@ -5,20 +5,35 @@ from datetime import timedelta
 from textwrap import dedent
 from unittest.mock import Mock
 
+from google.cloud import bigquery
+
+import attr
+import dask
+import mozanalysis.metrics
 import mozanalysis.segments
+import pyarrow as pa
 import pytest
 import pytz
 import toml
 
 import jetstream.analysis
 from jetstream.analysis import Analysis, AnalysisPeriod
+from jetstream.bigquery_client import jobs_as_completed
 from jetstream.config import AnalysisSpec
 from jetstream.errors import (
     ExplicitSkipException,
     HighPopulationException,
     NoEnrollmentPeriodException,
 )
-from jetstream.experimenter import ExperimentV1
+from jetstream.experimenter import Branch, ExperimentV1
+from jetstream.statistics import (
+    Binomial,
+    BootstrapMean,
+    Deciles,
+    EmpiricalCDF,
+    StatisticResultCollection,
+    Summary,
+)
 
 
 def test_get_timelimits_if_ready(experiments):
@@ -235,3 +250,554 @@ def test_firefox_ios_experiments_use_right_datasets(firefox_ios_experiments, mon
         config = AnalysisSpec.default_for_experiment(experiment).resolve(experiment)
         Analysis("spam", "eggs", config).validate()
         assert called == 2
+
+
+def test_plan_windows_deduplicates(experiments):
+    config = AnalysisSpec().resolve(experiments[0])
+    analysis = Analysis("test", "test", config)
+
+    start_date = dt.datetime(2019, 12, 1, tzinfo=pytz.utc)
+    windows = analysis._plan_windows(start_date, start_date + timedelta(days=20))
+
+    planned = [(period, len(tl.analysis_windows)) for period, tl in windows]
+    assert len(planned) == len(set(planned))
+    # enrollment ends on 2019-12-08, so daily windows close from 2019-12-08 to 2019-12-21
+    assert [i for p, i in planned if p == AnalysisPeriod.DAY] == list(range(1, 15))
+    assert [i for p, i in planned if p == AnalysisPeriod.WEEK] == [1, 2]
+    assert [p for p, _ in planned if p == AnalysisPeriod.OVERALL] == []
+
+    windows = analysis._plan_windows(
+        dt.datetime(2020, 2, 28, tzinfo=pytz.utc), dt.datetime(2020, 3, 5, tzinfo=pytz.utc)
+    )
+    planned = [(period, tl.analysis_windows[-1].end) for period, tl in windows]
+    assert (AnalysisPeriod.OVERALL, 83) in planned
+    # no windows are planned after the experiment has ended
+    assert max(i for p, i in planned if p == AnalysisPeriod.DAY) == 84
+
+
+def test_run_range_dry_run(experiments, monkeypatch):
+    config = AnalysisSpec.default_for_experiment(experiments[0]).resolve(experiments[0])
+    ensure_enrollments = Mock()
+    monkeypatch.setattr("jetstream.analysis.Analysis.ensure_enrollments", ensure_enrollments)
+    calculate_metrics = Mock(return_value=None)
+    monkeypatch.setattr("jetstream.analysis.Analysis.calculate_metrics", calculate_metrics)
+    monkeypatch.setattr("jetstream.analysis.current_cluster", Mock())
+
+    Analysis("test", "test", config).run_range(
+        dt.datetime(2019, 12, 1, tzinfo=pytz.utc),
+        dt.datetime(2019, 12, 21, tzinfo=pytz.utc),
+        dry_run=True,
+    )
+
+    ensure_enrollments.assert_called_once_with(dt.datetime(2019, 12, 21, tzinfo=pytz.utc))
+    periods = [c.args[2] for c in calculate_metrics.call_args_list]
+    assert periods.count(AnalysisPeriod.DAY) == 14
+    assert periods.count(AnalysisPeriod.WEEK) == 2
+
+
+def test_run_range_continues_after_failed_window(experiments, monkeypatch):
+    config = AnalysisSpec.default_for_experiment(experiments[0]).resolve(experiments[0])
+    computed = []
+
+    def statistics(self, period, metrics_table):
+        if metrics_table.endswith("_week_1"):
+            raise ValueError("statistics failed")
+        computed.append(metrics_table)
+
+    monkeypatch.setattr("jetstream.analysis.Analysis.ensure_enrollments", Mock())
+    monkeypatch.setattr(
+        "jetstream.analysis.Analysis.calculate_metrics", Mock(side_effect=lambda *args: Mock())
+    )
+    monkeypatch.setattr("jetstream.analysis.Analysis._summary_queries", Mock(return_value={}))
+    monkeypatch.setattr("jetstream.analysis.Analysis._statistics", statistics)
+    monkeypatch.setattr("jetstream.analysis.Analysis._publish_view", Mock())
+    monkeypatch.setattr("jetstream.analysis.BigQueryClient.wait", Mock())
+    monkeypatch.setattr("jetstream.analysis.current_cluster", Mock())
+
+    with pytest.raises(ValueError, match="statistics failed"):
+        Analysis("test", "test", config).run_range(
+            dt.datetime(2019, 12, 1, tzinfo=pytz.utc),
+            dt.datetime(2019, 12, 21, tzinfo=pytz.utc),
+        )
+
+    # the windows that closed after the failed one have still been computed
+    assert "normandy_test_slug_week_2" in computed
+    assert len([t for t in computed if "_day_" in t]) == 14
+
+
+def test_statistics_tasks_subset_segments(experiments):
+    conf = dedent(
+        """
+        [metrics]
+        weekly = ["active_hours"]
+
+        [metrics.active_hours.statistics.bootstrap_mean]
+        num_samples = 10
+        """
+    )
+    config = AnalysisSpec.from_dict(toml.loads(conf)).resolve(experiments[0])
+    summary = config.metrics[AnalysisPeriod.WEEK][0]
+    metrics_data = pa.table(
+        {
+            "branch": ["a"] * 10 + ["b"] * 10,
+            "active_hours": [float(i) for i in range(20)],
+            "regular_users_v3": [True, False] * 10,
+            "unused": list(range(20)),
+        }
+    )
+
+    frame = jetstream.analysis.partition_table(metrics_data, ["active_hours"], ["regular_users_v3"])
+    statistics, counts = dask.compute(
+        jetstream.analysis.calculate_statistics(
+            frame, ["regular_users_v3"], summary, config.experiment
+        ),
+        jetstream.analysis.counts(frame, ["regular_users_v3"], config.experiment),
+        scheduler="sync",
+    )
+
+    statistics, counts = statistics.to_dict()["data"], counts.to_dict()["data"]
+    assert {r["segment"] for r in statistics + counts} == {"regular_users_v3"}
+    assert {r["metric"] for r in statistics} == {"active_hours"}
+    assert {r["branch"]: r["point"] for r in counts} == {"a": 5, "b": 5}
+
+    with pytest.raises(ValueError):
+        dask.compute(
+            jetstream.analysis.counts(frame, ["missing_segment"], config.experiment),
+            scheduler="sync",
+        )
+
+
+def test_statistics_of_segments_without_clients(experiments):
+    config = AnalysisSpec().resolve(experiments[0])
+    summaries = [
+        Summary(
+            mozanalysis.metrics.Metric(name="value", data_source=None, select_expr="1"),
+            statistic,
+        )
+        for statistic in [BootstrapMean(num_samples=10), Deciles(), EmpiricalCDF()]
+    ]
+    metrics_data = pa.table(
+        {
+            "branch": ["a"] * 10 + ["b"] * 10,
+            "value": [float(i) for i in range(20)],
+            "regular_users_v3": [False] * 20,
+        }
+    )
+
+    frame = jetstream.analysis.partition_table(metrics_data, ["value"], ["regular_users_v3"])
+    bootstrap_means, statistics, counts = dask.compute(
+        jetstream.analysis.calculate_bootstrap_means(
+            frame, "regular_users_v3", summaries[:1], config.experiment
+        ),
+        [
+            jetstream.analysis.calculate_statistics(
+                frame, ["regular_users_v3"], summary, config.experiment
+            )
+            for summary in summaries[1:]
+        ],
+        jetstream.analysis.counts(frame, ["regular_users_v3"], config.experiment),
+        scheduler="sync",
+    )
+    assert len(bootstrap_means) == 0
+    assert all(len(s) == 0 for s in statistics)
+    assert set(counts.columns["point"]) == {0}
+
+
+@pytest.mark.parametrize("aggregate_pushdown", [False, True])
+def test_statistics_read_only_needed_columns(aggregate_pushdown, experiments, monkeypatch):
+    conf = dedent(
+        f"""
+        [experiment]
+        segments = ["regular_users_v3"]
+        aggregate_pushdown = {str(aggregate_pushdown).lower()}
+
+        [metrics]
+        weekly = ["active_hours", "uri_count", "days"]
+
+        [metrics.active_hours.statistics.bootstrap_mean]
+        num_samples = 10
+        [metrics.active_hours.statistics.deciles]
+        num_samples = 10
+        [metrics.uri_count.statistics.bootstrap_mean]
+        num_samples = 10
+
+        [metrics.days]
+        data_source = "main"
+        select_expression = "1"
+        discrete = true
+        [metrics.days.statistics.deciles]
+        method = "order_statistics"
+        """
+    )
+    config = AnalysisSpec.from_dict(toml.loads(conf)).resolve(experiments[0])
+    metrics_data = pa.table(
+        {
+            "branch": ["a"] * 10 + ["b"] * 10,
+            "regular_users_v3": [True, False] * 10,
+            "active_hours": [float(i) for i in range(20)],
+            "uri_count": [float(i) for i in range(20)],
+            "unused": list(range(20)),
+        }
+    )
+
+    aggregates = _aggregates(metrics_data, ["regular_users_v3"], [])
+    histograms = pa.table(
+        {
+            "segment": ["all", "all", "regular_users_v3", "regular_users_v3"],
+            "branch": ["a", "b", "a", "b"],
+            "metric": ["days"] * 4,
+            "value": [1.0] * 4,
+            "count": [10, 10, 5, 5],
+        }
+    )
+
+    requested_columns = []
+
+    def table_to_arrow(self, table, columns=None):
+        if table.startswith("aggregates_"):
+            return aggregates
+        if table.startswith("histograms_"):
+            return histograms
+        requested_columns.append(sorted(columns))
+        return metrics_data.select([c for c in columns if c in metrics_data.column_names])
+
+    execute = Mock()
+    submit = Mock(side_effect=lambda query, destination: Mock(name=destination))
+    save_statistics = Mock()
+    cluster = Mock()
+    cluster.client.compute = lambda result: dask.compute(result, scheduler="sync")
+    monkeypatch.setattr("jetstream.analysis.current_cluster", lambda: cluster)
+    monkeypatch.setattr("jetstream.analysis.BigQueryClient.table_to_arrow", table_to_arrow)
+    monkeypatch.setattr("jetstream.analysis.BigQueryClient.table_schema", Mock(return_value=[]))
+    monkeypatch.setattr("jetstream.analysis.BigQueryClient.execute", execute)
+    monkeypatch.setattr("jetstream.analysis.BigQueryClient.submit", submit)
+    monkeypatch.setattr("jetstream.analysis.BigQueryClient.wait", Mock())
+    monkeypatch.setattr("jetstream.analysis.Analysis._publish_view", Mock())
+    monkeypatch.setattr("jetstream.analysis.Analysis.calculate_metrics", Mock())
+    monkeypatch.setattr(
+        "jetstream.analysis.Analysis.save_statistics", dask.delayed(save_statistics)
+    )
+
+    analysis = Analysis("test", "test", config)
+    time_limits = analysis._get_timelimits_if_ready(
+        AnalysisPeriod.WEEK, dt.datetime(2019, 12, 14, tzinfo=pytz.utc)
+    )
+    analysis._run_windows([(AnalysisPeriod.WEEK, time_limits)], dry_run=False)
+
+    assert requested_columns == [["active_hours", "branch", "regular_users_v3", "uri_count"]]
+    # the summaries are queried by the coordinator rather than in statistics tasks
+    assert execute.call_count == 0
+    summary_tables = ["histograms_normandy_test_slug_week_1"]
+    if aggregate_pushdown:
+        summary_tables.insert(0, "aggregates_normandy_test_slug_week_1")
+    assert [c.args[1] for c in submit.call_args_list] == summary_tables
+
+    segment_results = StatisticResultCollection.concat(
+        save_statistics.call_args.args[-2]
+    ).to_dict()["data"]
+    assert {r["segment"] for r in segment_results} == {"all", "regular_users_v3"}
+    assert {r["metric"] for r in segment_results} == {
+        "active_hours",
+        "uri_count",
+        "days",
+        "identity",
+    }
+    assert {
+        (r["segment"], r["branch"]): r["point"]
+        for r in segment_results
+        if r["metric"] == "identity"
+    } == {
+        ("all", "a"): 10,
+        ("all", "b"): 10,
+        ("regular_users_v3", "a"): 5,
+        ("regular_users_v3", "b"): 5,
+    }
+
+
+def _aggregates(metrics_data, segments, metrics):
+    """Computes the aggregates that `aggregates_query` computes in BigQuery."""
+    df = metrics_data.to_pandas()
+    rows = []
+    for segment in ["all"] + segments:
+        segment_df = df if segment == "all" else df[df[segment]]
+        for metric in ["identity"] + metrics:
+            for branch, values in segment_df.groupby("branch"):
+                values = values[metric] if metric != "identity" else None
+                rows.append(
+                    {
+                        "segment": segment,
+                        "branch": branch,
+                        "metric": metric,
+                        "n": len(segment_df[segment_df.branch == branch]),
+                        "successes": 0 if values is None else int((values == 1).sum()),
+                        "invalid": 0 if values is None else int((~values.isin([0, 1])).sum()),
+                    }
+                )
+    return pa.Table.from_pydict({k: [row[k] for row in rows] for k in rows[0]})
+
+
+def test_aggregates_query():
+    schema = [
+        bigquery.SchemaField("branch", "STRING"),
+        bigquery.SchemaField("regular_users_v3", "BOOL"),
+        bigquery.SchemaField("converted", "BOOL"),
+        bigquery.SchemaField("active_days", "INT64"),
+        bigquery.SchemaField("country", "STRING"),
+    ]
+    sql = jetstream.analysis.aggregates_query(
+        "project.dataset.table",
+        schema,
+        ["converted", "active_days", "country", "missing"],
+        ["regular_users_v3"],
+    )
+
+    assert "FROM `project.dataset.table` AS metrics_data" in sql
+    assert "STRUCT('all' AS segment, TRUE AS in_segment)" in sql
+    assert "STRUCT('regular_users_v3' AS segment, metrics_data.`regular_users_v3`" in sql
+    assert "STRUCT('identity' AS metric, CAST(NULL AS FLOAT64) AS value)" in sql
+    assert "CAST(CAST(metrics_data.`converted` AS INT64) AS FLOAT64) AS value" in sql
+    assert "STRUCT('active_days' AS metric, CAST(metrics_data.`active_days` AS FLOAT64)" in sql
+    assert "STRUCT('country' AS metric, CAST(NULL AS FLOAT64) AS value)" in sql
+    assert "'missing'" not in sql
+
+    sql = jetstream.analysis.histograms_query(
+        "project.dataset.table", schema, ["active_days"], ["regular_users_v3"]
+    )
+    assert "metrics.value,\n    COUNT(*) AS count" in sql
+    assert "STRUCT('active_days' AS metric, CAST(metrics_data.`active_days` AS FLOAT64)" in sql
+    assert "'identity'" not in sql
+    assert "GROUP BY 1, 2, 3, 4" in sql
+
+
+def test_histogram_statistics(experiments):
+    config = AnalysisSpec().resolve(experiments[0])
+    summary = Summary(
+        mozanalysis.metrics.Metric(name="days", data_source=None, select_expr="1"),
+        Deciles(method="order_statistics"),
+        discrete=True,
+    )
+    histograms = pa.table(
+        {
+            "segment": ["all"] * 4 + ["regular_users_v3"] * 2,
+            "branch": ["a", "a", "b", "b", "a", "b"],
+            "metric": ["days"] * 6,
+            "value": [0.0, 1.0, 0.0, 1.0, 1.0, 1.0],
+            "count": [10, 20, 15, 5, 3, 4],
+        }
+    )
+
+    (result,) = dask.compute(
+        jetstream.analysis.calculate_histogram_statistics(
+            histograms, "regular_users_v3", summary, config.experiment
+        ),
+        scheduler="sync",
+    )
+    rows = result.to_dict()["data"]
+    assert {r["segment"] for r in rows} == {"regular_users_v3"}
+    assert {r["point"] for r in rows if r["comparison"] is None} == {1}
+
+
+def test_partitioned_statistics_match_client_level_statistics(experiments):
+    config = AnalysisSpec().resolve(experiments[0])
+    summaries = [
+        Summary(
+            mozanalysis.metrics.Metric(name="days", data_source=None, select_expr="1"),
+            statistic,
+        )
+        for statistic in [
+            Deciles(method="order_statistics"),
+            BootstrapMean(method="normal"),
+            EmpiricalCDF(),
+        ]
+    ]
+    metrics_data = pa.table(
+        {
+            "branch": ["a", "b", "b", "a"] * 20,
+            "regular_users_v3": [True, False, True] * 26 + [True, True],
+            "days": [0, 0, 1, 3, 7] * 16,
+        }
+    )
+
+    frame = jetstream.analysis.partition_table(metrics_data, ["days"], ["regular_users_v3"])
+    segment_data = metrics_data.filter(metrics_data["regular_users_v3"])
+    for summary in summaries:
+        (partitioned,) = dask.compute(
+            jetstream.analysis.calculate_statistics(
+                frame, ["all", "regular_users_v3"], summary, config.experiment
+            ),
+            scheduler="sync",
+        )
+        expected = StatisticResultCollection.concat(
+            [
+                summary.run(metrics_data, config.experiment).set_segment("all"),
+                summary.run(segment_data, config.experiment).set_segment("regular_users_v3"),
+            ]
+        )
+        assert len(partitioned) > 0
+        assert partitioned == expected
+
+
+def test_aggregate_statistics_match_client_level_statistics(experiments):
+    config = AnalysisSpec().resolve(experiments[0])
+    summary = Summary(
+        mozanalysis.metrics.Metric(name="converted", data_source=None, select_expr="1"),
+        Binomial(num_samples=1000, seed=42),
+    )
+    metrics_data = pa.table(
+        {
+            "branch": ["a"] * 10 + ["b"] * 20,
+            "regular_users_v3": [True, False, False] * 10,
+            "converted": [True, False] * 15,
+        }
+    )
+    aggregates = _aggregates(metrics_data, ["regular_users_v3"], ["converted"])
+
+    for segment in ["all", "regular_users_v3"]:
+        frame = jetstream.analysis.partition_table(
+            metrics_data, ["converted"], ["regular_users_v3"]
+        )
+        expected, actual, expected_counts, actual_counts = dask.compute(
+            jetstream.analysis.calculate_statistics(frame, [segment], summary, config.experiment),
+            jetstream.analysis.calculate_aggregate_statistics(
+                aggregates, segment, summary, config.experiment
+            ),
+            jetstream.analysis.counts(frame, [segment], config.experiment),
+            jetstream.analysis.aggregate_counts(aggregates, segment, config.experiment),
+            scheduler="sync",
+        )
+        assert len(actual) > 0
+        assert actual == expected
+        assert actual_counts == expected_counts
+
+    # invalid values are reported like for client-level data
+    invalid = _aggregates(metrics_data, [], ["branch"])
+    (result,) = dask.compute(
+        jetstream.analysis.calculate_aggregate_statistics(
+            invalid,
+            "all",
+            Summary(summary.metric, Binomial()),
+            config.experiment,
+        ),
+        scheduler="sync",
+    )
+    assert len(result) == 0
+
+
+def test_aggregate_statistics_without_reference_branch(experiments):
+    # branches are configured, and come first in the client-level data, in reverse
+    # alphabetical order, unlike the rows of the aggregates
+    experiment = attr.evolve(
+        experiments[0],
+        branches=[Branch(slug="b", ratio=1), Branch(slug="a", ratio=1)],
+        reference_branch=None,
+    )
+    config = AnalysisSpec().resolve(experiment)
+    summary = Summary(
+        mozanalysis.metrics.Metric(name="converted", data_source=None, select_expr="1"),
+        Binomial(num_samples=1000, seed=42),
+    )
+    metrics_data = pa.table({"branch": ["b", "a"] * 15, "converted": [True, False, False] * 10})
+    aggregates = _aggregates(metrics_data, [], ["converted"])
+    assert aggregates["branch"].to_pylist()[0] == "a"
+
+    frame = jetstream.analysis.partition_table(metrics_data, ["converted"], [])
+    expected, actual = dask.compute(
+        jetstream.analysis.calculate_statistics(frame, ["all"], summary, config.experiment),
+        jetstream.analysis.calculate_aggregate_statistics(
+            aggregates, "all", summary, config.experiment
+        ),
+        scheduler="sync",
+    )
+
+    # the individual results of the samples may come in a different order
+    def rows(results):
+        return sorted(results.to_dict()["data"], key=lambda r: (r["branch"], str(r["comparison"])))
+
+    comparisons = [r for r in rows(actual) if r["comparison"] is not None]
+    assert comparisons and {r["branch"] for r in comparisons} == {"a"}
+    assert rows(actual) == rows(expected)
+
+
+def test_histogram_statistics_without_reference_branch(experiments):
+    # branches are configured in reverse alphabetical order, unlike the rows of the histograms
+    experiment = attr.evolve(
+        experiments[0],
+        branches=[Branch(slug="b", ratio=1), Branch(slug="a", ratio=1)],
+        reference_branch=None,
+    )
+    config = AnalysisSpec().resolve(experiment)
+    summary = Summary(
+        mozanalysis.metrics.Metric(name="days", data_source=None, select_expr="1"),
+        BootstrapMean(num_samples=100, seed=42),
+    )
+    metrics_data = pa.table({"branch": ["b", "a"] * 15, "days": [1.0, 2.0, 2.0, 3.0, 5.0] * 6})
+    histograms = pa.Table.from_pandas(
+        metrics_data.to_pandas()
+        .groupby(["branch", "days"])
+        .size()
+        .reset_index(name="count")
+        .rename(columns={"days": "value"})
+        .assign(segment="all", metric="days")
+    )
+    assert histograms["branch"].to_pylist()[0] == "a"
+
+    frame = jetstream.analysis.partition_table(metrics_data, ["days"], [])
+    expected, actual = dask.compute(
+        jetstream.analysis.calculate_statistics(frame, ["all"], summary, config.experiment),
+        jetstream.analysis.calculate_histogram_statistics(
+            histograms, "all", summary, config.experiment
+        ),
+        scheduler="sync",
+    )
+
+    comparisons = [r for r in actual.to_dict()["data"] if r["comparison"] is not None]
+    assert comparisons and {r["branch"] for r in comparisons} == {"a"}
+    assert actual == expected
+
+
+def test_publish_view_only_replaces_changed_views(experiments, monkeypatch):
+    config = AnalysisSpec().resolve(experiments[0])
+    bigquery_client = Mock()
+    bigquery_client.return_value.view_query.return_value = None
+    monkeypatch.setattr("jetstream.analysis.BigQueryClient", bigquery_client)
+    monkeypatch.setattr("jetstream.analysis._published_views", {})
+    analysis = Analysis("project", "dataset", config)
+
+    analysis._publish_view(AnalysisPeriod.WEEK)
+    analysis._publish_view(AnalysisPeriod.WEEK)
+    assert bigquery_client.return_value.execute.call_count == 1
+    sql = bigquery_client.return_value.execute.call_args.args[0]
+    assert "CREATE OR REPLACE VIEW `project.dataset.normandy_test_slug_weekly`" in sql
+
+    analysis._publish_view(AnalysisPeriod.WEEK, table_prefix="statistics")
+    assert bigquery_client.return_value.execute.call_count == 2
+
+    # views that are up to date in BigQuery aren't replaced either
+    monkeypatch.setattr("jetstream.analysis._published_views", {})
+    existing_query = sql.split(" AS ", 1)[1]
+    bigquery_client.return_value.view_query.return_value = existing_query
+    analysis._publish_view(AnalysisPeriod.WEEK)
+    assert bigquery_client.return_value.execute.call_count == 2
+
+
+def test_jobs_as_completed(monkeypatch):
+    sleep = Mock()
+    monkeypatch.setattr("jetstream.bigquery_client.time.sleep", sleep)
+    slow, fast = Mock(), Mock()
+    slow.done.side_effect = [False, False, True]
+    fast.done.side_effect = [False, True]
+
+    assert list(jobs_as_completed([slow, fast])) == [fast, slow]
+    assert sleep.call_count == 1
+
+    # jobs submitted while iterating are waited for, too
+    first, second = Mock(), Mock()
+    second.done.side_effect = [False, True]
+    jobs = {first: None}
+    completed = []
+    for job in jobs_as_completed(jobs):
+        completed.append(job)
+        if job is first:
+            jobs[second] = None
+    assert completed == [first, second]
+    assert sleep.call_count == 2
@@ -0,0 +1,50 @@
+import pickle
+from unittest.mock import Mock
+
+import google.cloud.bigquery
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from jetstream import bigquery_client
+from jetstream.bigquery_client import BigQueryClient
+
+
+class TestBigQueryClient:
+    def test_clients_are_shared(self, monkeypatch):
+        google_client = Mock()
+        storage_client = Mock()
+        monkeypatch.setattr("jetstream.bigquery_client._clients", {})
+        monkeypatch.setattr("jetstream.bigquery_client._storage_clients", [])
+        monkeypatch.setattr("google.cloud.bigquery.client.Client", google_client)
+        monkeypatch.setattr("jetstream.bigquery_client.BigQueryReadClient", storage_client)
+
+        first = BigQueryClient("project", "dataset")
+        second = BigQueryClient("project", "other_dataset")
+        assert first.client is second.client
+        assert first.storage_client is second.storage_client
+        google_client.assert_called_once_with("project")
+        storage_client.assert_called_once()
+
+        BigQueryClient("other_project", "dataset").client
+        assert google_client.call_count == 2
+        assert set(bigquery_client._clients) == {"project", "other_project"}
+
+    def test_clients_are_not_pickled(self, monkeypatch):
+        monkeypatch.setattr("jetstream.bigquery_client._clients", {"project": Mock()})
+        client = BigQueryClient("project", "dataset")
+        client.client
+        assert pickle.loads(pickle.dumps(client)) == client
+
+    def test_load_table_from_arrow(self, monkeypatch):
+        google_client = Mock()
+        monkeypatch.setattr("jetstream.bigquery_client._clients", {"project": google_client})
+        monkeypatch.setattr(BigQueryClient, "add_labels_to_table", Mock())
+        table = pa.table({"branch": ["a", "b"], "point": [1.0, None]})
+
+        job_config = google.cloud.bigquery.LoadJobConfig()
+        BigQueryClient("project", "dataset").load_table_from_arrow(table, "statistics", job_config)
+
+        buffer, destination = google_client.load_table_from_file.call_args.args
+        assert destination == "project.dataset.statistics"
+        assert pq.read_table(buffer) == table
+        assert job_config.source_format == google.cloud.bigquery.SourceFormat.PARQUET
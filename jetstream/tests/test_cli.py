@@ -12,6 +12,7 @@ from unittest import mock
 
 from jetstream import cli, experimenter, external_config
 from jetstream.config import AnalysisSpec
+from jetstream.util import inclusive_date_range
 
 
 @pytest.fixture(name="cli_experiments")
@@ -68,13 +69,13 @@ class TestCli:
     def test_inclusive_date_range(self):
         start_date = dt.date(2020, 5, 1)
         end_date = dt.date(2020, 5, 1)
-        date_range = list(cli.inclusive_date_range(start_date, end_date))
+        date_range = list(inclusive_date_range(start_date, end_date))
         assert len(date_range) == 1
         assert date_range[0] == dt.date(2020, 5, 1)
 
         start_date = dt.date(2020, 5, 1)
         end_date = dt.date(2020, 5, 5)
-        date_range = list(cli.inclusive_date_range(start_date, end_date))
+        date_range = list(inclusive_date_range(start_date, end_date))
         assert len(date_range) == 5
         assert date_range[0] == dt.date(2020, 5, 1)
         assert date_range[4] == dt.date(2020, 5, 5)
@@ -172,6 +173,30 @@ class TestAnalysisExecutor:
         assert strategy.worklist[0][1] == dt.datetime(2020, 10, 28, tzinfo=UTC)
         assert bigquery_mock_client.called is False
 
+    def test_single_date_without_closing_windows(self):
+        experiments = cli_experiments()
+        experiments.experiments[0] = attr.evolve(experiments.experiments[0], proposed_enrollment=7)
+        # analysis windows close once the enrollment period has ended, so experiments
+        # are neither analysed nor have their metadata exported before
+        worklists = {}
+        for day in [3, 8]:
+            executor = cli.AnalysisExecutor(
+                project_id="project",
+                dataset_id="dataset",
+                bucket="bucket",
+                date=dt.datetime(2020, 1, day, tzinfo=UTC),
+                experiment_slugs=["my_cool_experiment"],
+            )
+            strategy = DummyExecutorStrategy("project", "dataset")
+            assert executor.execute(
+                experiment_getter=lambda: experiments,
+                config_getter=external_config.ExternalConfigCollection,
+                strategy=strategy,
+            )
+            worklists[day] = [date.day for _, date in strategy.worklist]
+
+        assert worklists == {3: [], 8: [8]}
+
     def test_recreate_enrollments(self, monkeypatch):
         executor = cli.AnalysisExecutor(
             project_id="project",
@@ -423,6 +448,27 @@ class TestSerialExecutorStrategy:
         fake_analysis.assert_called_once_with("spam", "eggs", config)
         fake_analysis().run.assert_called_once_with(run_date)
 
+    def test_multi_date_workflow(self, cli_experiments, monkeypatch):
+        monkeypatch.setattr("jetstream.cli.export_metadata", Mock())
+        fake_analysis = Mock()
+        experiment = cli_experiments.experiments[0]
+        spec = AnalysisSpec.default_for_experiment(experiment)
+        strategy = cli.SerialExecutorStrategy(
+            project_id="spam",
+            dataset_id="eggs",
+            bucket="bucket",
+            analysis_class=fake_analysis,
+            experiment_getter=lambda: cli_experiments,
+            config_getter=external_config.ExternalConfigCollection,
+            multi_date=True,
+        )
+        config = spec.resolve(experiment)
+        run_dates = [dt.datetime(2020, 10, day, tzinfo=UTC) for day in range(1, 32)]
+        strategy.execute([(config, date) for date in run_dates])
+        fake_analysis.assert_called_once_with("spam", "eggs", config)
+        fake_analysis().run.assert_not_called()
+        fake_analysis().run_range.assert_called_once_with(run_dates[0], run_dates[-1])
+
 
 class TestArgoExecutorStrategy:
     def test_simple_workflow(self, cli_experiments):
@@ -211,6 +211,46 @@ class TestAnalysisSpec:
 
         assert bootstrap_mean.num_samples == 10
 
+    def test_statistic_method_is_opt_in(self, experiments):
+        config_str = dedent(
+            """
+            [metrics]
+            weekly = ["spam", "eggs"]
+
+            [metrics.spam]
+            data_source = "main"
+            select_expression = "1"
+
+            [metrics.spam.statistics.bootstrap_mean]
+            [metrics.spam.statistics.deciles]
+
+            [metrics.eggs]
+            data_source = "main"
+            select_expression = "1"
+
+            [metrics.eggs.statistics.bootstrap_mean]
+            method = "auto"
+            normal_approximation_threshold = 1000
+            [metrics.eggs.statistics.deciles]
+            method = "auto"
+            order_statistics_threshold = 1000
+            """
+        )
+
+        spec = config.AnalysisSpec.from_dict(toml.loads(config_str))
+        cfg = spec.resolve(experiments[0])
+        statistics = {
+            (m.metric.name, m.statistic.name()): m.statistic
+            for m in cfg.metrics[AnalysisPeriod.WEEK]
+        }
+
+        assert statistics["spam", "bootstrap_mean"].method == "bootstrap"
+        assert statistics["spam", "deciles"].method == "bootstrap"
+        assert statistics["eggs", "bootstrap_mean"].method == "auto"
+        assert statistics["eggs", "bootstrap_mean"].normal_approximation_threshold == 1000
+        assert statistics["eggs", "deciles"].method == "auto"
+        assert statistics["eggs", "deciles"].order_statistics_threshold == 1000
+
     def test_overwrite_default_statistic(self, experiments):
         config_str = dedent(
             """
@@ -258,6 +298,30 @@ class TestAnalysisSpec:
         assert len(pre_treatments) == 1
         assert pre_treatments[0].__class__ == RemoveNulls
 
+    def test_discrete_metric(self, experiments):
+        config_str = dedent(
+            """
+            [metrics]
+            weekly = ["spam"]
+
+            [metrics.spam]
+            data_source = "main"
+            select_expression = "1"
+            discrete = true
+
+            [metrics.spam.statistics.bootstrap_mean]
+            [metrics.spam.statistics.deciles]
+            """
+        )
+
+        spec = config.AnalysisSpec.from_dict(toml.loads(config_str))
+        cfg = spec.resolve(experiments[0])
+        summaries = [m for m in cfg.metrics[AnalysisPeriod.WEEK] if m.metric.name == "spam"]
+
+        assert len(summaries) == 2
+        assert all(m.discrete for m in summaries)
+        assert not any(m.discrete for m in cfg.metrics[AnalysisPeriod.WEEK] if m not in summaries)
+
     def test_invalid_pre_treatment(self, experiments):
         config_str = dedent(
             """
@@ -414,6 +478,19 @@ class TestExperimentSpec:
         configured = spec.resolve(experiments[0])
         assert configured.experiment.reference_branch == "a"
 
+    def test_aggregate_pushdown(self, experiments):
+        trivial = config.AnalysisSpec().resolve(experiments[0])
+        assert not trivial.experiment.aggregate_pushdown
+
+        conf = dedent(
+            """
+            [experiment]
+            aggregate_pushdown = true
+            """
+        )
+        spec = config.AnalysisSpec.from_dict(toml.loads(conf))
+        assert spec.resolve(experiments[0]).experiment.aggregate_pushdown
+
     def test_recognizes_segments(self, experiments):
         conf = dedent(
             """
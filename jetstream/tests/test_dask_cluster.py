@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from jetstream import dask_cluster
+from jetstream.dask_cluster import DaskCluster, current_cluster
+
+
+@pytest.fixture
+def local_cluster(monkeypatch):
+    local_cluster = MagicMock()
+    local_cluster.return_value.workers = {0: "worker", 1: "worker"}
+    client = MagicMock()
+    client.return_value.status = "running"
+    client.return_value.scheduler_info.return_value = {"workers": {"tcp://worker": {}}}
+    monkeypatch.setattr("jetstream.dask_cluster.LocalCluster", local_cluster)
+    monkeypatch.setattr("jetstream.dask_cluster.Client", client)
+    return local_cluster, client
+
+
+class TestDaskCluster:
+    def test_cluster_is_started_lazily(self, local_cluster):
+        cluster_class, client_class = local_cluster
+        with DaskCluster() as cluster:
+            assert current_cluster() is cluster
+            cluster_class.assert_not_called()
+
+            client = cluster.client
+            assert cluster.client is client
+            cluster_class.assert_called_once()
+            client.wait_for_workers.assert_called_once_with(2, timeout=cluster.worker_timeout)
+
+        client.close.assert_called_once()
+        cluster_class.return_value.close.assert_called_once()
+        assert cluster not in dask_cluster._active_clusters
+
+    def test_unhealthy_cluster_is_restarted(self, local_cluster):
+        cluster_class, client_class = local_cluster
+        with DaskCluster() as cluster:
+            cluster.client
+            client_class.return_value.status = "closed"
+            assert not cluster.healthy()
+            cluster.client
+
+        assert cluster_class.call_count == 2
+
+    def test_nested_clusters(self, local_cluster):
+        with DaskCluster() as outer:
+            with DaskCluster() as inner:
+                assert current_cluster() is inner
+            assert current_cluster() is outer
@@ -0,0 +1,64 @@
+import datetime as dt
+
+import attr
+import pytz
+
+from jetstream import AnalysisPeriod
+from jetstream.analysis import Analysis
+from jetstream.config import AnalysisSpec
+from jetstream.schedule import AnalysisSchedule, AnalysisTask, closing_window_index
+
+
+def _date(*args):
+    return dt.datetime(*args, tzinfo=pytz.utc)
+
+
+class TestSchedule:
+    def test_closing_window_index(self, experiments):
+        config = AnalysisSpec().resolve(experiments[0])
+        experiment = config.experiment
+
+        assert closing_window_index(experiment, AnalysisPeriod.DAY, _date(2019, 12, 7)) is None
+        assert closing_window_index(experiment, AnalysisPeriod.DAY, _date(2019, 12, 8)) == 1
+        assert closing_window_index(experiment, AnalysisPeriod.DAY, _date(2019, 12, 20)) == 13
+        assert closing_window_index(experiment, AnalysisPeriod.WEEK, _date(2019, 12, 13)) is None
+        assert closing_window_index(experiment, AnalysisPeriod.WEEK, _date(2019, 12, 14)) == 1
+        assert closing_window_index(experiment, AnalysisPeriod.WEEK, _date(2019, 12, 21)) == 2
+        assert closing_window_index(experiment, AnalysisPeriod.DAYS_28, _date(2020, 1, 4)) == 1
+        assert closing_window_index(experiment, AnalysisPeriod.OVERALL, _date(2020, 2, 29)) is None
+        assert closing_window_index(experiment, AnalysisPeriod.OVERALL, _date(2020, 3, 1)) == 1
+
+    def test_overall_requires_complete_experiment(self, experiments):
+        experiment = AnalysisSpec().resolve(experiments[2]).experiment
+        assert closing_window_index(experiment, AnalysisPeriod.OVERALL, _date(2020, 3, 1)) is None
+
+    def test_schedule_for_config(self, experiments):
+        config = AnalysisSpec().resolve(experiments[0])
+        schedule = AnalysisSchedule.for_config(config, _date(2019, 12, 1), _date(2019, 12, 21))
+
+        assert schedule.dates[0] == _date(2019, 12, 8)
+        assert schedule.dates[-1] == _date(2019, 12, 21)
+        assert AnalysisTask(_date(2019, 12, 21), AnalysisPeriod.WEEK, 2) in schedule.tasks
+        assert {t.period for t in schedule.tasks_on(_date(2019, 12, 14))} == {
+            AnalysisPeriod.DAY,
+            AnalysisPeriod.WEEK,
+        }
+        assert AnalysisPeriod.OVERALL not in {t.period for t in schedule.tasks}
+
+    def test_schedule_matches_timelimits(self, experiments):
+        config = AnalysisSpec().resolve(experiments[0])
+        analysis = Analysis("test", "test", config)
+        schedule = AnalysisSchedule.for_config(config, _date(2019, 12, 1), _date(2020, 3, 1))
+
+        for task in schedule.tasks:
+            time_limits = analysis._get_timelimits_if_ready(task.period, task.date)
+            assert time_limits is not None
+            if task.period != AnalysisPeriod.OVERALL:
+                assert len(time_limits.analysis_windows) == task.window_index
+
+    def test_empty_schedule_without_start_date(self, experiments):
+        experiment = attr.evolve(experiments[0], start_date=None)
+        config = AnalysisSpec().resolve(experiment)
+        schedule = AnalysisSchedule.for_config(config, _date(2019, 12, 1), _date(2019, 12, 21))
+        assert schedule.tasks == []
+        assert schedule.dates == []
@@ -1,16 +1,34 @@
+from decimal import Decimal
 from pathlib import Path
 
+import attr
+import mozanalysis.metrics
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import pytest
+import statsmodels.api as sm
+from statsmodels.distributions.empirical_distribution import ECDF
 
+from jetstream import statistics
+from jetstream.pre_treatment import CensorHighestValues
 from jetstream.statistics import (
     Binomial,
     BootstrapMean,
+    BranchPartitionedFrame,
+    CompressedColumn,
     Count,
+    Deciles,
     EmpiricalCDF,
     KernelDensityEstimate,
     StatisticResult,
+    StatisticResultCollection,
+    Summary,
+    _binned_kde,
+    _bootstrap_quantiles,
     _make_grid,
+    _quantiles_of_resamples,
+    run_bootstrap_means,
 )
 
 
@@ -35,6 +53,337 @@ class TestStatistics:
         assert treatment_result.point < control_result.point
         assert treatment_result.lower and treatment_result.upper
 
+    def test_bootstrap_means_normal_approximation(self):
+        rng = np.random.default_rng(42)
+        test_data = pd.DataFrame(
+            {
+                "branch": ["treatment"] * 2000 + ["control"] * 2000,
+                "value": np.concatenate([rng.normal(11, 2, 2000), rng.normal(10, 2, 2000)]),
+            }
+        )
+        bootstrap = BootstrapMean(num_samples=2000, method="bootstrap", drop_highest=0)
+        normal = BootstrapMean(method="normal", drop_highest=0)
+        bootstrap_result = bootstrap.transform(test_data, "value", "control", None).data
+        normal_result = normal.transform(test_data, "value", "control", None).data
+
+        def key(r):
+            return (r.branch, r.comparison)
+
+        assert [key(r) for r in normal_result] == [key(r) for r in bootstrap_result]
+        assert {r.method for r in bootstrap_result} == {"bootstrap"}
+        assert {r.method for r in normal_result} == {"normal"}
+        for expected, actual in zip(bootstrap_result, normal_result):
+            assert actual.point == pytest.approx(expected.point, abs=0.02)
+            assert actual.lower == pytest.approx(expected.lower, abs=0.02)
+            assert actual.upper == pytest.approx(expected.upper, abs=0.02)
+
+    def test_bootstrap_means_auto_method(self):
+        stat = BootstrapMean(method="auto", normal_approximation_threshold=10)
+        assert stat.uses_normal_approximation([10, 20])
+        assert not stat.uses_normal_approximation([9, 20])
+        assert not BootstrapMean().uses_normal_approximation([10**9])
+        assert BootstrapMean(method="normal").uses_normal_approximation([1])
+        assert not BootstrapMean(method="bootstrap").uses_normal_approximation([10**9])
+
+        with pytest.raises(ValueError):
+            BootstrapMean(method="magic")
+
+    @pytest.mark.parametrize(
+        "stat,metric",
+        [
+            (BootstrapMean(num_samples=2500, seed=42), "count"),
+            (Deciles(num_samples=2500, method="bootstrap", seed=42), "count"),
+            (Binomial(num_samples=2500, seed=42), "converted"),
+        ],
+    )
+    def test_seeded_statistics_are_deterministic(self, stat, metric, monkeypatch):
+        rng = np.random.default_rng(0)
+        count = rng.integers(1, 6, 200)
+        test_data = pd.DataFrame(
+            {"branch": ["a"] * 100 + ["b"] * 100, "count": count, "converted": count > 3}
+        )
+        expected = stat.transform(test_data, metric, "a", None)
+
+        monkeypatch.setattr(statistics, "BOOTSTRAP_THREADS", 4)
+        shuffled = test_data.sample(frac=1, random_state=1)
+        assert stat.transform(shuffled, metric, "a", None) == expected
+
+        unseeded = attr.evolve(stat, seed=None)
+        assert unseeded.transform(test_data, metric, "a", None) != expected
+
+    @pytest.mark.parametrize(
+        "stat,metric",
+        [
+            (BootstrapMean(num_samples=1000, seed=42), "count"),
+            (Deciles(num_samples=1000, method="bootstrap", seed=42), "count"),
+            (Binomial(num_samples=1000, seed=42), "converted"),
+        ],
+    )
+    def test_seeded_statistics_do_not_depend_on_thread_count(self, stat, metric, monkeypatch):
+        rng = np.random.default_rng(0)
+        count = rng.integers(1, 6, 200)
+        test_data = pd.DataFrame(
+            {"branch": ["a"] * 100 + ["b"] * 100, "count": count, "converted": count > 3}
+        )
+        monkeypatch.setattr(statistics, "BOOTSTRAP_BLOCK_SIZE", 100)
+        monkeypatch.setattr(statistics, "BOOTSTRAP_THREADS", 1)
+        expected = stat.transform(test_data, metric, "a", None)
+
+        for threads in (2, 3, 4):
+            monkeypatch.setattr(statistics, "BOOTSTRAP_THREADS", threads)
+            assert stat.transform(test_data, metric, "a", None) == expected
+
+    @pytest.mark.parametrize(
+        "stat",
+        [
+            BootstrapMean(num_samples=500, seed=42),
+            Deciles(num_samples=500, method="bootstrap", seed=42),
+            Deciles(method="order_statistics"),
+            EmpiricalCDF(),
+            EmpiricalCDF(log_space=True, shared_grid=True),
+        ],
+    )
+    def test_histograms_match_client_level_data(self, stat, experiments):
+        rng = np.random.default_rng(0)
+        test_data = pd.DataFrame(
+            {"branch": ["a"] * 300 + ["b"] * 200, "days": rng.integers(0, 29, 500)}
+        )
+        histograms = (
+            test_data.groupby(["branch", "days"])
+            .size()
+            .reset_index(name="count")
+            .rename(columns={"days": "value"})
+            .sample(frac=1, random_state=1)
+            # branches are in the order calculate_histogram_statistics puts them in
+            .sort_values("branch", kind="stable")
+        )
+
+        expected = stat.apply(test_data, "days", experiments[0])
+        actual = stat.apply_histograms(histograms, "days", experiments[0])
+        assert len(actual) > 0
+        assert actual == expected
+
+    def test_histogram_means_normal_approximation(self, experiments):
+        rng = np.random.default_rng(0)
+        test_data = pd.DataFrame(
+            {"branch": ["a"] * 300 + ["b"] * 200, "days": rng.integers(0, 29, 500)}
+        )
+        histograms = (
+            test_data.groupby(["branch", "days"])
+            .size()
+            .reset_index(name="count")
+            .rename(columns={"days": "value"})
+        )
+        stat = BootstrapMean(method="normal", drop_highest=0.05)
+
+        expected = stat.apply(test_data, "days", experiments[0]).data
+        actual = stat.apply_histograms(histograms, "days", experiments[0]).data
+        assert len(actual) == len(expected) > 0
+        for e, a in zip(expected, actual):
+            assert (a.branch, a.comparison, a.method) == (e.branch, e.comparison, "normal")
+            assert a.point == pytest.approx(e.point)
+            assert a.lower == pytest.approx(e.lower)
+            assert a.upper == pytest.approx(e.upper)
+
+    @pytest.mark.parametrize(
+        "stat",
+        [
+            BootstrapMean(num_samples=500, seed=42),
+            Deciles(num_samples=500, method="bootstrap", seed=42),
+            Deciles(method="order_statistics"),
+            EmpiricalCDF(),
+            Count(),
+        ],
+    )
+    def test_compressed_column_matches_client_level_data(self, stat, experiments):
+        rng = np.random.default_rng(0)
+        days = rng.integers(0, 29, 500) * rng.binomial(1, 0.3, 500)
+        test_data = pd.DataFrame({"branch": ["b"] * 200 + ["a"] * 300, "days": days})
+        column = CompressedColumn.from_frame(test_data, "days")
+
+        expected = stat.apply(test_data, "days", experiments[0])
+        actual = stat.apply_compressed(column, "days", experiments[0])
+        assert len(actual) > 0
+        assert actual == expected
+
+    def test_compressed_kde(self, experiments):
+        rng = np.random.default_rng(0)
+        test_data = pd.DataFrame(
+            {"branch": ["a"] * 300 + ["b"] * 200, "days": rng.integers(0, 29, 500)}
+        )
+        column = CompressedColumn.from_frame(test_data, "days")
+        stat = KernelDensityEstimate()
+
+        expected = stat.apply(test_data, "days", experiments[0]).data
+        actual = stat.apply_compressed(column, "days", experiments[0]).data
+        assert len(actual) == len(expected) > 0
+        for e, a in zip(expected, actual):
+            assert (a.branch, a.parameter) == (e.branch, e.parameter)
+            assert a.point == pytest.approx(e.point)
+
+    def test_compressed_column(self):
+        test_data = pd.DataFrame(
+            {"branch": ["b", "a", "a", "b", "c", "a"], "value": [0, 0, 2, 0, 5, 0]}
+        )
+        column = CompressedColumn.from_frame(test_data, "value")
+        assert column.branches == ["b", "a", "c"]
+        assert column.sizes() == {"b": 2, "a": 3, "c": 1}
+
+        values, counts = column.histogram("a")
+        assert values.tolist() == [0, 2]
+        assert counts.tolist() == [2, 1]
+
+        selected = column.select(["a", "b"])
+        assert selected.branches == ["a", "b"]
+        assert selected.values.tolist() == [0, 2]
+
+    def test_compressed_column_with_nulls(self):
+        test_data = pd.DataFrame(
+            {
+                "branch": ["b", "a", "a", "b", "a", "b", "a"],
+                "value": [np.nan, 0.0, np.nan, 1.0, np.nan, np.nan, 0.0],
+            }
+        )
+        frame = BranchPartitionedFrame.from_frame(test_data)
+        for column in [CompressedColumn.from_frame(test_data, "value"), frame.compressed("value")]:
+            assert column.values[:2].tolist() == [0.0, 1.0]
+            assert len(column.values) == 3 and np.isnan(column.values[2])
+            assert column.sizes() == {"b": 3, "a": 4}
+            for branch, group in test_data.groupby("branch"):
+                expected = group["value"].value_counts(dropna=False).sort_index()
+                values, counts = column.histogram(branch)
+                assert values.tolist() == pytest.approx(expected.index.tolist(), nan_ok=True)
+                assert counts.tolist() == expected.tolist()
+
+    @pytest.mark.parametrize(
+        "stat",
+        [
+            BootstrapMean(num_samples=500, seed=42),
+            BootstrapMean(method="normal"),
+            Binomial(num_samples=500, seed=42),
+            Deciles(num_samples=500, method="bootstrap", seed=42),
+            Deciles(method="order_statistics"),
+            EmpiricalCDF(),
+            KernelDensityEstimate(),
+            Count(),
+        ],
+    )
+    @pytest.mark.parametrize("reference_branch", ["a", None])
+    def test_partitioned_frame_matches_client_level_data(self, stat, reference_branch, experiments):
+        rng = np.random.default_rng(0)
+        test_data = pd.DataFrame(
+            {
+                "branch": rng.choice(["b", "a", "c"], 600),
+                "value": rng.binomial(1, 0.3, 600) * rng.integers(1, 9, 600),
+            }
+        )
+        if isinstance(stat, Binomial):
+            test_data["value"] = test_data["value"] > 0
+        experiment = attr.evolve(experiments[0], reference_branch=reference_branch)
+        frame = BranchPartitionedFrame.from_frame(test_data)
+
+        expected = stat.apply(test_data, "value", experiment)
+        actual = stat.apply_partitioned(frame, "value", experiment)
+        assert len(actual) > 0
+        assert actual == expected
+
+    @pytest.mark.parametrize(
+        "stat",
+        [
+            BootstrapMean(num_samples=500, seed=42),
+            BootstrapMean(method="normal"),
+            Binomial(num_samples=500, seed=42),
+            Deciles(method="order_statistics"),
+            EmpiricalCDF(),
+            KernelDensityEstimate(),
+            Count(),
+        ],
+    )
+    @pytest.mark.parametrize("reference_branch", ["a", None])
+    def test_segment_views_match_segment_data(self, stat, reference_branch, experiments):
+        rng = np.random.default_rng(0)
+        test_data = pd.DataFrame(
+            {
+                "branch": rng.choice(["b", "a", "c"], 600),
+                "value": rng.binomial(1, 0.3, 600) * rng.integers(1, 9, 600),
+                "segment": rng.binomial(1, 0.5, 600).astype(bool),
+            }
+        )
+        # branch "c" has no clients in the segment, and "b" comes first in the data but
+        # "a" comes first in the segment
+        test_data.loc[test_data.branch == "c", "segment"] = False
+        test_data.loc[0, ["branch", "segment"]] = ["b", False]
+        test_data.loc[1, ["branch", "segment"]] = ["a", True]
+        if isinstance(stat, Binomial):
+            test_data["value"] = test_data["value"] > 0
+        experiment = attr.evolve(experiments[0], reference_branch=reference_branch)
+        frame = BranchPartitionedFrame.from_frame(test_data, segments=["segment"])
+
+        segment_data = test_data[test_data.segment][["branch", "value"]]
+        expected = stat.apply(segment_data, "value", experiment)
+        actual = stat.apply_partitioned(frame.segment("segment"), "value", experiment)
+        assert len(actual) > 0
+        assert actual == expected
+
+    def test_partitioned_frame(self):
+        test_data = pd.DataFrame(
+            {
+                "branch": ["b", "a", None, "a", "b", "c"],
+                "value": [3.0, 2.0, 9.0, 1.0, 0.0, 5.0],
+            }
+        )
+        frame = BranchPartitionedFrame.from_frame(test_data)
+        assert frame.branches == ["b", "a", "c"]
+        assert frame.offsets.tolist() == [0, 2, 4, 5]
+        assert frame.sizes() == {"b": 2, "a": 2, "c": 1}
+        assert frame.values("value", "a").tolist() == [2.0, 1.0]
+        assert frame.sorted_values("value", "b").tolist() == [0.0, 3.0]
+        assert frame.compressed("value").histogram("b")[0].tolist() == [0.0, 3.0]
+
+        segmented = BranchPartitionedFrame.from_frame(
+            test_data.assign(segment=[True, False, True, True, None, False]),
+            segments=["segment"],
+        )
+        assert segmented.segment_sizes()["segment"].tolist() == [1, 1, 0]
+        segment = segmented.segment("segment")
+        assert segment.branches == ["b", "a"]
+        assert segment.values("value").tolist() == [3.0, 1.0]
+        assert segment.compressed("value").values.tolist() == [1.0, 3.0]
+        assert segmented.segment("all") is segmented
+        with pytest.raises(ValueError):
+            segmented.segment("missing")
+
+        selected = frame.select(["c", "b"])
+        assert selected.sizes() == {"c": 1, "b": 2}
+        assert selected.values("value").tolist() == [5.0, 3.0, 0.0]
+        assert selected.to_frame("value").branch.tolist() == ["c", "b", "b"]
+
+    def test_adaptive_bootstrap_stops_at_convergence(self, monkeypatch):
+        rng = np.random.default_rng(0)
+        test_data = pd.DataFrame(
+            {"branch": ["a"] * 500 + ["b"] * 500, "value": rng.normal(10, 1, 1000)}
+        )
+        full = BootstrapMean(num_samples=10000, seed=1).branch_samples(test_data, "value")
+        adaptive_stat = BootstrapMean(num_samples=10000, seed=1, convergence_tolerance=0.05)
+        adaptive = adaptive_stat.branch_samples(test_data, "value")
+
+        num_samples = len(adaptive["a"])
+        assert len(adaptive["b"]) == num_samples
+        assert 2 * statistics.BOOTSTRAP_BLOCK_SIZE <= num_samples < 10000
+        # adaptive replicates are a prefix of the full set, for any number of threads
+        assert (adaptive["a"] == full["a"][:num_samples]).all()
+        monkeypatch.setattr(statistics, "BOOTSTRAP_THREADS", 3)
+        threaded = adaptive_stat.branch_samples(test_data, "value")
+        assert (threaded["a"] == adaptive["a"]).all()
+
+        strict = attr.evolve(adaptive_stat, convergence_tolerance=1e-6)
+        assert len(strict.branch_samples(test_data, "value")["a"]) == 10000
+
+        # the number of replicates is reported with the results
+        result = adaptive_stat.transform(test_data, "value", "a", None)
+        assert {r.num_samples for r in result.data} == {num_samples}
+        assert set(result.to_arrow()["num_samples"].to_pylist()) == {num_samples}
+
     def test_binomial(self):
         stat = Binomial()
         test_data = pd.DataFrame(
@@ -99,6 +448,26 @@ class TestStatistics:
         assert ("control", "foo", "difference") in comparison_branches
         assert ("control", "foo", "relative_uplift") in comparison_branches
 
+    def test_bootstrap_means_all_pairs_resample_once(self, experiments, monkeypatch):
+        stat = BootstrapMean(num_samples=100)
+        test_data = pd.DataFrame(
+            {"branch": ["a"] * 10 + ["b"] * 10 + ["c"] * 10, "value": np.arange(30.0)}
+        )
+        calls = []
+        branch_samples = stat.branch_samples
+        monkeypatch.setattr(
+            stat, "branch_samples", lambda *args: calls.append(args) or branch_samples(*args)
+        )
+
+        result = stat.apply(test_data, "value", experiments[1])
+
+        assert len(calls) == 1
+        comparisons = {
+            (r.comparison_to_branch, r.branch) for r in result.data if r.comparison == "difference"
+        }
+        assert comparisons == {("a", "b"), ("a", "c"), ("b", "c")}
+        assert {r.branch for r in result.data if r.comparison is None} == {"a", "b", "c"}
+
     @pytest.mark.parametrize("geometric", [True, False])
     def test_make_grid_makes_a_grid(self, wine, geometric):
         result = _make_grid(wine["ash"], 256, geometric)
@@ -142,6 +511,28 @@ class TestStatistics:
         result = stat.transform(wine, "ash", "*", None).data
         assert len(result) > 0
 
+    @pytest.mark.parametrize("kernel", ["gau", "epa", "tri", "biw", "cos"])
+    def test_binned_kde_matches_direct_evaluation(self, wine, kernel):
+        values = wine["ash"].to_numpy()
+        points = np.linspace(values.min(), values.max(), 50)
+        kde = sm.nonparametric.KDEUnivariate(values)
+        kde.fit(kernel=kernel, fft=kernel == "gau")
+        expected = np.array([kde.evaluate(p) for p in points]).ravel()
+
+        result = _binned_kde(values, points, kde.bw, kernel)
+        assert result == pytest.approx(expected, abs=0.01 * expected.max())
+
+    def test_binned_kde_with_wide_range(self, caplog):
+        values = np.append(np.random.default_rng(0).normal(0, 1, 1000), 1e7)
+        points = np.linspace(-3, 3, 50)
+        result = _binned_kde(values, points, 0.3, "gau")
+        assert np.isfinite(result).all() and (result >= 0).all()
+        assert "bins of the kernel density estimate" in caplog.text
+
+        caplog.clear()
+        _binned_kde(values[:-1], points, 0.3, "gau")
+        assert "bins of the kernel density estimate" not in caplog.text
+
     def test_kde_with_geom_zero(self, wine):
         wine = wine.copy()
         wine.loc[0, "ash"] = 0
@@ -167,8 +558,231 @@ class TestStatistics:
 
         assert stat.name() == "empirical_cdf"
 
+    @pytest.mark.parametrize("log_space", [False, True])
+    def test_ecdf_matches_statsmodels(self, wine, experiments, log_space):
+        result = EmpiricalCDF(log_space=log_space).transform(wine, "ash", "*", experiments[0])
+        for branch, group in wine.groupby("branch"):
+            ecdf = ECDF(group["ash"])
+            rows = [r for r in result.data if r.branch == branch]
+            assert len(rows) == 256
+            for r in rows:
+                assert r.point == pytest.approx(ecdf(float(r.parameter)))
+
+    def test_ecdf_shared_grid(self, wine, experiments):
+        stat = EmpiricalCDF(shared_grid=True)
+        result = stat.transform(wine, "ash", "*", experiments[0]).data
+        grids = {}
+        for r in result:
+            grids.setdefault(r.branch, []).append(r.parameter)
+        assert len(grids) == 3
+        assert len({tuple(grid) for grid in grids.values()}) == 1
+        assert min(r.point for r in result) == 0
+        assert max(r.point for r in result) == 1
+
+    def test_ecdf_shared_grid_includes_zero_for_every_branch(self, experiments):
+        df = pd.DataFrame(
+            {"branch": ["control"] * 4 + ["treatment"] * 4, "value": [0, 1, 10, 100, 2, 3, 50, 80]}
+        )
+        stat = EmpiricalCDF(log_space=True, shared_grid=True, grid_size=16)
+        result = stat.transform(df, "value", "control", experiments[0]).data
+        grids = {}
+        for r in result:
+            grids.setdefault(r.branch, []).append(r.parameter)
+        assert grids["control"] == grids["treatment"]
+        assert grids["treatment"][0] == 0
+        assert [r.point for r in result if r.branch == "treatment"][0] == 0
+
     def test_statistic_result_rejects_invalid_types(self):
         args = {"metric": "foo", "statistic": "bar", "branch": "baz"}
         StatisticResult(**args)
         with pytest.raises(ValueError):
             StatisticResult(point=[3], **args)
+
+    def test_statistic_result_collection_columns(self):
+        rows = StatisticResultCollection(
+            [StatisticResult(metric="m", statistic="s", branch="a", parameter="0.1", point=1)]
+        )
+        columns = StatisticResultCollection.from_columns(
+            metric="m",
+            statistic="s",
+            branch=["b", "c"],
+            parameter=[0.5, None],
+            point=[np.inf, 2.0],
+        )
+        collection = StatisticResultCollection.concat([rows, columns]).set_segment("all")
+
+        assert len(collection) == 3
+        assert [r.branch for r in collection.data] == ["a", "b", "c"]
+        assert collection.data[2].parameter is None
+        assert collection.to_dict()["data"][0]["parameter"] == "0.1"
+        assert [r["point"] for r in collection.to_dict()["data"]] == [1, None, 2]
+        assert {r["segment"] for r in collection.to_dict()["data"]} == {"all"}
+        assert rows.data[0].segment is None
+
+        with pytest.raises(ValueError):
+            StatisticResultCollection.from_columns(metric="m", statistic="s", branch="a", point="1")
+        with pytest.raises(TypeError):
+            StatisticResultCollection.from_columns(metric="m", statistic="s")
+
+    def test_statistic_result_collection_rounds_parameters_exactly(self):
+        rng = np.random.default_rng(0)
+        parameters = np.concatenate(
+            [
+                rng.lognormal(0, 5, 1000),
+                -rng.lognormal(0, 5, 1000),
+                np.arange(-1000, 1000) / 2e6,  # ties at the rounded decimal place
+                [0, 10, 1200, 1e12, 1e20, 0.1 + 0.2],
+            ]
+        )
+        collection = StatisticResultCollection.from_columns(
+            metric="m", statistic="s", branch="a", parameter=parameters
+        )
+
+        table = collection.to_arrow()
+        assert [f.name for f in table.schema] == [f.name for f in StatisticResult.bq_schema]
+        expected = [round(Decimal(p), 6) for p in parameters]
+        assert table["parameter"].to_pylist() == expected
+        assert [Decimal(r["parameter"]) for r in collection.to_dict()["data"]] == expected
+
+    def test_statistic_result_collection_data_round_trips_parameters(self):
+        collection = StatisticResultCollection(
+            [
+                StatisticResult(metric="m", statistic="s", branch="a", parameter="0.1"),
+                StatisticResult(metric="m", statistic="s", branch="a", parameter=Decimal("2.5")),
+                StatisticResult(metric="m", statistic="s", branch="a"),
+            ]
+        )
+        collection.to_arrow()
+        assert [r.parameter for r in collection.data] == [Decimal("0.1"), Decimal("2.5"), None]
+
+    def test_summary_runs_on_arrow_tables(self, experiments):
+        metric = mozanalysis.metrics.Metric(name="value", data_source=None, select_expr="1")
+        summary = Summary(metric, BootstrapMean(num_samples=10))
+        test_data = pa.table(
+            {
+                "branch": ["a"] * 10 + ["b"] * 10,
+                "value": [float(i) for i in range(20)],
+                "unused": list(range(20)),
+            }
+        )
+        result = summary.run(test_data, experiments[0]).data
+        assert {r.branch for r in result} == {"a", "b"}
+
+    def test_run_bootstrap_means(self, experiments):
+        rng = np.random.default_rng(42)
+        test_data = pd.DataFrame(
+            {
+                "branch": ["a"] * 500 + ["b"] * 500,
+                "first": np.concatenate([rng.normal(10, 1, 500), rng.normal(11, 1, 500)]),
+                "second": rng.integers(0, 5, 1000).astype(float),
+                "with_nulls": [None] + [1.0] * 999,
+            }
+        )
+        summaries = [
+            Summary(
+                mozanalysis.metrics.Metric(name=name, data_source=None, select_expr="1"),
+                BootstrapMean(num_samples=1000),
+                pre_treatments,
+            )
+            for name, pre_treatments in [
+                ("first", []),
+                ("second", [CensorHighestValues(fraction=0.9)]),
+                ("with_nulls", []),
+                ("missing", []),
+            ]
+        ]
+
+        result = run_bootstrap_means(summaries, test_data, experiments[0]).data
+        means = {(r.metric, r.branch): r.point for r in result if r.comparison is None}
+        assert set(means) == {("first", "a"), ("first", "b"), ("second", "a"), ("second", "b")}
+        assert means[("first", "a")] == pytest.approx(test_data["first"][:500].mean(), abs=0.1)
+        assert means[("first", "b")] == pytest.approx(test_data["first"][500:].mean(), abs=0.1)
+        censored = test_data["second"][test_data["second"] < test_data["second"].quantile(0.9)]
+        assert means[("second", "a")] == pytest.approx(censored[:500].mean(), abs=0.1)
+
+        difference = [r for r in result if r.metric == "first" and r.comparison == "difference"]
+        assert len(difference) == 1
+        assert difference[0].branch == "a" and difference[0].comparison_to_branch == "b"
+        assert difference[0].lower < difference[0].point < difference[0].upper
+        assert {r.method for r in result} == {"bootstrap"}
+        assert {r.num_samples for r in result} == {1000}
+
+    def test_run_bootstrap_means_normal_approximation(self, experiments):
+        test_data = pd.DataFrame({"branch": ["a"] * 50 + ["b"] * 50, "value": np.arange(100.0)})
+        summary = Summary(
+            mozanalysis.metrics.Metric(name="value", data_source=None, select_expr="1"),
+            BootstrapMean(drop_highest=0, method="auto", normal_approximation_threshold=50),
+        )
+        result = run_bootstrap_means([summary], test_data, experiments[0]).data
+        means = {r.branch: r for r in result if r.comparison is None}
+        assert {(r.method, r.num_samples) for r in result} == {("normal", None)}
+        assert means["a"].point == 24.5
+        standard_error = test_data["value"][:50].std() / np.sqrt(50)
+        assert means["a"].upper - means["a"].point == pytest.approx(1.96 * standard_error, 1e-3)
+
+    @pytest.mark.parametrize("reference_branch", ["a", None])
+    @pytest.mark.parametrize("method", ["auto", "bootstrap", "normal"])
+    def test_run_bootstrap_means_without_clients(self, reference_branch, method, experiments):
+        test_data = pd.DataFrame({"branch": pd.Series([], dtype=object), "value": []})
+        summary = Summary(
+            mozanalysis.metrics.Metric(name="value", data_source=None, select_expr="1"),
+            BootstrapMean(num_samples=10, method=method),
+        )
+        experiment = attr.evolve(experiments[0], reference_branch=reference_branch)
+        assert len(run_bootstrap_means([summary], test_data, experiment)) == 0
+
+    def test_quantiles_of_resamples_match_numpy(self, wine):
+        distinct = np.unique(wine["ash"])
+        resample_counts = np.random.default_rng(1).multinomial(
+            len(wine), np.full(len(distinct), 1 / len(distinct)), size=50
+        )
+        result = _quantiles_of_resamples(distinct, resample_counts, Deciles.DECILES)
+
+        expected = np.array(
+            [np.quantile(np.repeat(distinct, c), Deciles.DECILES) for c in resample_counts]
+        )
+        assert np.array_equal(result, expected)
+
+    @pytest.mark.parametrize("decimals", [0, 6])
+    def test_bootstrap_quantiles(self, decimals):
+        values = np.random.default_rng(2).exponential(3, 1000).round(decimals)
+        result = _bootstrap_quantiles(values, Deciles.DECILES, 100, np.random.default_rng(3))
+        assert result.shape == (100, 9)
+        assert (np.diff(result, axis=1) >= 0).all()
+        assert np.abs(result.mean(axis=0) - np.quantile(values, Deciles.DECILES)).max() < 0.5
+
+    def test_deciles(self, wine):
+        stat = Deciles(num_samples=100)
+        result = stat.transform(wine, "ash", 1, None).to_dict()["data"]
+        individual = [r for r in result if r["comparison"] is None and r["branch"] == "1"]
+        assert [r["parameter"] for r in individual] == [f"0.{i}" for i in range(1, 10)]
+        median = [r for r in individual if r["parameter"] == "0.5"][0]
+        assert median["lower"] <= wine["ash"][wine.branch == 1].median() <= median["upper"]
+        assert {r["comparison"] for r in result} == {None, "difference", "relative_uplift"}
+
+    def test_deciles_order_statistics(self, wine):
+        bootstrap = Deciles(num_samples=100, method="bootstrap").transform(wine, "ash", 1, None)
+        analytic = Deciles(method="order_statistics").transform(wine, "ash", 1, None)
+
+        def key(r):
+            return (r.branch, r.parameter, r.comparison)
+
+        assert set(map(key, analytic.data)) == set(map(key, bootstrap.data))
+        for r in analytic.data:
+            assert r.lower <= r.point <= r.upper
+        median = [
+            r
+            for r in analytic.data
+            if r.comparison is None and r.branch == 1 and float(r.parameter) == 0.5
+        ][0]
+        assert median.point == wine["ash"][wine.branch == 1].median()
+
+    def test_deciles_auto_method(self, wine):
+        threshold = wine.groupby("branch").size().min()
+        above = Deciles(method="auto", order_statistics_threshold=threshold)
+        analytic = Deciles(method="order_statistics").transform(wine, "ash", 1, None)
+        assert above.transform(wine, "ash", 1, None) == analytic
+        assert Deciles().method == "bootstrap"
+
+        with pytest.raises(ValueError):
+            Deciles(method="magic")
@@ -0,0 +1,86 @@
+import datetime as dt
+import os
+from unittest.mock import Mock
+
+import pyarrow as pa
+
+from jetstream.bigquery_client import BigQueryClient
+from jetstream.table_cache import TableCache
+
+
+def _table(n=100):
+    return pa.table({"branch": ["a", "b"] * n, "value": list(range(2 * n))})
+
+
+class TestTableCache:
+    def test_get_put(self, tmp_path):
+        cache = TableCache(tmp_path)
+        key = cache.key("project.dataset.table", "1", ["value", "branch"])
+        assert key == cache.key("project.dataset.table", "1", ["branch", "value"])
+        assert key != cache.key("project.dataset.table", "2", ["branch", "value"])
+        assert key != cache.key("project.dataset.table", "1")
+
+        assert cache.get(key) is None
+        cache.put(key, _table())
+        assert cache.get(key).equals(_table())
+
+    def test_unreadable_entries_are_misses(self, tmp_path, monkeypatch):
+        cache = TableCache(tmp_path)
+        cache.put("truncated", _table())
+        file = tmp_path / "truncated.parquet"
+        file.write_bytes(file.read_bytes()[:100])
+        assert cache.get("truncated") is None
+
+        cache.put("unreadable", _table())
+
+        def read_table(*args, **kwargs):
+            raise PermissionError("permission denied")
+
+        monkeypatch.setattr("jetstream.table_cache.pq.read_table", read_table)
+        assert cache.get("unreadable") is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = TableCache(tmp_path)
+        for i, key in enumerate(["first", "second", "third"]):
+            cache.put(key, _table())
+            os.utime(tmp_path / f"{key}.parquet", (i, i))
+        cache.get("first")
+
+        cache.max_size = 2 * (tmp_path / "first.parquet").stat().st_size
+        cache.evict()
+
+        assert cache.get("second") is None
+        assert cache.get("first") is not None
+        assert cache.get("third") is not None
+
+    def test_from_env(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("JETSTREAM_CACHE_DIR", raising=False)
+        assert TableCache.from_env() is None
+
+        monkeypatch.setenv("JETSTREAM_CACHE_DIR", str(tmp_path))
+        monkeypatch.setenv("JETSTREAM_CACHE_SIZE", "1000")
+        assert TableCache.from_env() == TableCache(tmp_path, 1000)
+
+    def test_bigquery_client_reads_through_cache(self, tmp_path):
+        client = Mock()
+        client.get_table.return_value.full_table_id = "project:dataset.table"
+        client.get_table.return_value.modified = dt.datetime(2021, 2, 15, 12, 0, 0, 1000)
+        client.get_table.return_value.num_rows = 3
+        client.get_table.return_value.schema = []
+        client.list_rows.return_value.to_arrow.return_value = _table()
+
+        bigquery = BigQueryClient(
+            "project", "dataset", client=client, storage_client=Mock(), cache=TableCache(tmp_path)
+        )
+        assert bigquery.table_to_arrow("table").equals(_table())
+        assert bigquery.table_to_arrow("table").equals(_table())
+        assert client.list_rows.call_count == 1
+
+        # re-written within the same second, with the same number of rows
+        client.get_table.return_value.modified = dt.datetime(2021, 2, 15, 12, 0, 0, 2000)
+        bigquery.table_to_arrow("table")
+        assert client.list_rows.call_count == 2
+
+        client.get_table.return_value.num_rows = 4
+        bigquery.table_to_arrow("table")
+        assert client.list_rows.call_count == 3